@@ -0,0 +1,179 @@
+'''
+Корпус страниц docs.python.org и peps.python.org для бенчмарков.
+
+Запись реальных страниц (нужен доступ к сети):
+    python benchmarks/corpus.py record
+Генерация страниц той же структуры без сети:
+    python benchmarks/corpus.py synthesize [--peps 700]
+'''
+import argparse
+import io
+import json
+import sys
+import tempfile
+import zipfile
+from argparse import Namespace
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+
+from requests_cache import CachedSession
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR / 'src'))
+
+import main
+import modes
+
+CORPUS_DIR = Path(__file__).resolve().parent / 'corpus'
+INDEX_FILE = 'index.html'
+PARAGRAPH = (
+    '<p>The <a class="reference internal" href="#x"><code>asyncio</code>'
+    '</a> module gained <em>new</em> features, see <a href="#y">PEP</a>.</p>'
+)
+VERSIONS = (
+    ('3.13', 'in development'), ('3.12', 'stable'), ('3.11', 'stable'),
+    ('3.10', 'security-fixes'), ('3.9', 'security-fixes'), ('3.8', 'EOL'),
+)
+STATUSES = ('Active', 'Final', 'Rejected', 'Withdrawn', 'Draft', 'Deferred')
+
+
+def url_to_path(url, corpus_dir=CORPUS_DIR):
+    '''Файл корпуса для адреса страницы.'''
+    parts = urlsplit(url)
+    path = parts.path.lstrip('/')
+    if not path or path.endswith('/'):
+        path += INDEX_FILE
+    return corpus_dir / parts.netloc / path
+
+
+def write_page(url, content, corpus_dir=CORPUS_DIR):
+    '''Сохранение страницы в корпус.'''
+    path = url_to_path(url, corpus_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    path.write_bytes(content)
+
+
+def record(corpus_dir=CORPUS_DIR):
+    '''
+    Запись страниц, которые загружают режимы парсера: режимы
+    выполняются на сессии с кешем в памяти, затем содержимое
+    кеша и загруженный архив сохраняются в корпус.
+    '''
+    session = CachedSession(backend='memory')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        modes.BASE_DIR = Path(tmp_dir)
+        for mode in ('whats-new', 'latest-versions', 'download', 'pep'):
+            results = main.MODE_TO_FUNCTION[mode](session)
+            if results:
+                list(results)
+        # Карточки PEP загружает только проверка с --cards.
+        list(main.pep(session, Namespace(cards=True)))
+        for archive in Path(tmp_dir).glob(f'{modes.DOWNLOADS}/*.zip'):
+            write_page(
+                urljoin(modes.MAIN_DOC_URL, f'archives/{archive.name}'),
+                archive.read_bytes(),
+                corpus_dir
+            )
+    for response in session.cache.responses.values():
+        write_page(response.url, response.content, corpus_dir)
+
+
+def page(title, body):
+    '''HTML-страница в оформлении документации.'''
+    return (
+        f'<html><head><title>{title}</title></head><body>'
+        f'<div class="body">{body}</div></body></html>'
+    )
+
+
+def synthesize(corpus_dir=CORPUS_DIR, peps=700, articles=40, paragraphs=150):
+    '''Генерация страниц со структурой реальных страниц.'''
+    docs = modes.MAIN_DOC_URL
+    sidebar = ''.join(
+        f'<li><a href="https://docs.python.org/{version}/">'
+        f'Python {version} ({status})</a></li>'
+        for version, status in VERSIONS
+    )
+    write_page(docs, page('Python docs', (
+        '<div class="sphinxsidebarwrapper"><ul>'
+        f'{sidebar}<li><a href="https://www.python.org/doc/versions/">'
+        'All versions</a></li></ul></div>' + PARAGRAPH * paragraphs
+    )), corpus_dir)
+    links = ''.join(
+        f'<li class="toctree-l1"><a href="3.{number}.html">'
+        f'What’s New In Python 3.{number}</a></li>'
+        for number in range(articles)
+    )
+    write_page(docs + 'whatsnew/', page('What’s New', (
+        f'<ul>{links}<li class="toctree-l1">'
+        '<a href="changelog.html">Changelog</a></li></ul>'
+    )), corpus_dir)
+    for number in range(articles):
+        write_page(docs + f'whatsnew/3.{number}.html', page('Article', (
+            f'<h1>What’s New In Python 3.{number}</h1>'
+            '<dl><dt>Editor</dt><dd>Guido van Rossum</dd></dl>'
+            + PARAGRAPH * paragraphs
+        )), corpus_dir)
+    write_page(docs + 'download.html', page('Download', (
+        '<table class="docutils"><tr>'
+        '<td><a href="archives/python-docs-pdf-a4.zip">Download</a></td>'
+        '<td><a href="archives/python-docs-html.zip">Download</a></td>'
+        '</tr></table>'
+    )), corpus_dir)
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w') as zip_file:
+        for number in range(20):
+            zip_file.writestr(
+                f'docs-pdf/library-{number}.pdf', PARAGRAPH * 2000
+            )
+    write_page(
+        docs + 'archives/python-docs-pdf-a4.zip', archive.getvalue(),
+        corpus_dir
+    )
+    rows = []
+    statuses = {}
+    for number in range(peps):
+        status = STATUSES[number % len(STATUSES)]
+        statuses[number] = dict(
+            number=number, title='Title', authors='Guido van Rossum',
+            status=status, type='Standards Track',
+            url=modes.PEPS_MAIN_URL + f'pep-{number:04d}/'
+        )
+        rows.append(
+            f'<tr><td><abbr title="Standards Track, {status}">S'
+            f'{status[0]}</abbr></td><td><a href="pep-{number:04d}/">'
+            f'{number}</a></td><td>Title</td></tr>'
+        )
+        write_page(modes.PEPS_MAIN_URL + f'pep-{number:04d}/', page('PEP', (
+            '<dl class="rfc2822 field-list simple">'
+            '<dt class="field-odd">Author<span class="colon">:</span></dt>'
+            '<dd class="field-odd">Guido van Rossum</dd>'
+            '<dt class="field-even">Status<span class="colon">:</span></dt>'
+            f'<dd class="field-even"><abbr>{status}</abbr></dd>'
+            '<dt class="field-odd">Type<span class="colon">:</span></dt>'
+            '<dd class="field-odd">Standards Track</dd></dl>'
+            + PARAGRAPH * paragraphs
+        )), corpus_dir)
+    write_page(modes.PEPS_MAIN_URL, page('PEP 0', (
+        '<section id="numerical-index"><table><tr><th>PEP</th></tr>'
+        f'{"".join(rows)}</table></section>'
+    )), corpus_dir)
+    write_page(modes.PEPS_JSON_URL, json.dumps(statuses), corpus_dir)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('action', choices=('record', 'synthesize'))
+    parser.add_argument('--peps', type=int, default=700)
+    parser.add_argument('--corpus', type=Path, default=CORPUS_DIR)
+    args = parser.parse_args()
+    if args.action == 'record':
+        record(args.corpus)
+    else:
+        synthesize(args.corpus, peps=args.peps)
+
+
+if __name__ == '__main__':
+    main_cli()
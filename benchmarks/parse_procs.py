@@ -0,0 +1,74 @@
+'''
+Ускорение разбора страниц пулом процессов при «тёплом» кеше.
+
+Запуск из корня проекта:
+    python benchmarks/parse_procs.py [--pages 100] [--repeat 3]
+'''
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import requests_mock
+from requests_cache import CachedSession
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR / 'src'))
+
+from modes import pep_card_status
+from utils import fetch_records
+
+PAGE_URL = 'https://peps.python.org/pep-{number:04d}/'
+PAGE = (
+    '<html><body><dl class="rfc2822 field-list simple">'
+    '<dt class="field-odd">Status<span class="colon">:</span></dt>'
+    '<dd class="field-odd"><abbr>Final</abbr></dd></dl>'
+    '<section>{body}</section></body></html>'
+)
+PARAGRAPH = '<p>Lorem <a href="#x">ipsum</a> <em>dolor</em> sit amet.</p>'
+ROW = '{procs:>6} {seconds:>10.3f} {speedup:>9.2f}x'
+
+
+def warm_session(urls):
+    '''Сессия, в кеше которой уже лежат все страницы.'''
+    session = CachedSession(backend='memory')
+    body = PARAGRAPH * 200
+    with requests_mock.Mocker() as mock:
+        for url in urls:
+            mock.get(url, text=PAGE.format(body=body))
+            session.get(url)
+    return session
+
+
+def measure(session, urls, procs, repeat):
+    '''Лучшее время из repeat прогонов.'''
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        list(fetch_records(session, urls, pep_card_status, parse_procs=procs))
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    urls = [PAGE_URL.format(number=number) for number in range(args.pages)]
+    session = warm_session(urls)
+    cores = os.cpu_count() or 1
+    procs_counts = sorted({1, *(2 ** i for i in range(8) if 2 ** i <= cores)})
+    print(f'{"procs":>6} {"seconds":>10} {"speedup":>10}')
+    baseline = None
+    for procs in procs_counts:
+        seconds = measure(session, urls, procs, args.repeat)
+        baseline = baseline or seconds
+        print(ROW.format(
+            procs=procs, seconds=seconds, speedup=baseline / seconds
+        ))
+
+
+if __name__ == '__main__':
+    main()
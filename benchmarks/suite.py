@@ -0,0 +1,240 @@
+'''
+Офлайн-бенчмарки режимов парсера на записанном корпусе страниц.
+
+Корпус (benchmarks/corpus) раздаётся локальным HTTP-сервером;
+режимы whats-new, latest-versions, pep и download замеряются
+с холодным и тёплым кешем, функции making_soup и find_tag -
+отдельно, запуск CLI (импорт main и вызов --help) - в отдельном
+процессе. Результаты сохраняются в JSON для сравнения коммитов.
+
+Запуск из корня проекта:
+    python benchmarks/suite.py [--repeat 3] [--output bench.json]
+    python benchmarks/suite.py --compare old.json --output new.json
+Если корпус не записан, он генерируется во временную директорию.
+'''
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from argparse import Namespace
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from requests_cache import CachedSession
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+SRC_DIR = BASE_DIR / 'src'
+sys.path.append(str(SRC_DIR))
+
+import main
+import modes
+import utils
+from corpus import CORPUS_DIR, INDEX_FILE, synthesize
+
+MODES = ('whats-new', 'latest-versions', 'pep', 'download')
+ROW = '{name:<28} {old:>10} {new:>10} {ratio:>8}'
+
+
+class CorpusHandler(SimpleHTTPRequestHandler):
+    '''Раздача файлов корпуса; адреса каталогов ведут на index.html.'''
+
+    def log_message(self, *args):
+        pass
+
+    def translate_path(self, path):
+        file_path = Path(super().translate_path(path))
+        if path.split('?')[0].endswith('/'):
+            file_path /= INDEX_FILE
+        return str(file_path)
+
+    def end_headers(self):
+        path = Path(self.translate_path(self.path))
+        if path.is_file():
+            stat = path.stat()
+            self.send_header(
+                'ETag', f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+            )
+        super().end_headers()
+
+
+def serve(corpus_dir):
+    '''Локальный сервер корпуса в фоновом потоке.'''
+    server = ThreadingHTTPServer(
+        ('127.0.0.1', 0),
+        lambda *args: CorpusHandler(*args, directory=str(corpus_dir))
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def timings_summary(timings):
+    return dict(
+        min=min(timings),
+        median=statistics.median(timings),
+        max=max(timings),
+        repeat=len(timings)
+    )
+
+
+def measure(func, repeat, setup=lambda: ()):
+    '''Время выполнения func; setup готовит аргументы вне замера.'''
+    timings = []
+    for _ in range(repeat):
+        args = setup()
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return timings_summary(timings)
+
+
+def run_mode(mode, session, cli_args):
+    results = main.MODE_TO_FUNCTION[mode](session, cli_args)
+    if results:
+        list(results)
+
+
+def fresh_session(work_dir):
+    '''Сессия с пустым кешем и отдельной BASE_DIR для загрузок.'''
+    run_dir = Path(tempfile.mkdtemp(dir=work_dir))
+    modes.BASE_DIR = run_dir
+    return CachedSession(str(run_dir / 'http_cache'))
+
+
+def bench_modes(work_dir, repeat, cli_args):
+    '''Режимы парсера целиком с холодным и тёплым кешем.'''
+    report = {}
+    for mode in MODES:
+        report[f'{mode}/cold'] = measure(
+            lambda session: run_mode(mode, session, cli_args),
+            repeat,
+            lambda: (fresh_session(work_dir),)
+        )
+        session = fresh_session(work_dir)
+        run_mode(mode, session, cli_args)
+        report[f'{mode}/warm'] = measure(
+            lambda: run_mode(mode, session, cli_args), repeat
+        )
+    return report
+
+
+def bench_utils(work_dir, repeat):
+    '''Функции making_soup и find_tag на тёплом кеше.'''
+    session = fresh_session(work_dir)
+    whats_new_url = modes.MAIN_DOC_URL + 'whatsnew/'
+    article_url = whats_new_url + utils.making_soup(
+        session, whats_new_url
+    ).select_one('li.toctree-l1 > a')['href']
+    soup = utils.making_soup(session, article_url)
+    number = repeat * 20
+    return {
+        'utils.making_soup': measure(
+            lambda: utils.making_soup(session, article_url), number
+        ),
+        'utils.find_tag': measure(
+            lambda: utils.find_tag(soup, 'dl'), number
+        ),
+    }
+
+
+def bench_startup(repeat):
+    '''Запуск CLI в новом процессе: импорт main и вызов --help.'''
+    def run_python(*args):
+        subprocess.run(
+            [sys.executable, *args], cwd=SRC_DIR, capture_output=True,
+            check=True
+        )
+
+    return {
+        'startup/import': measure(
+            lambda: run_python('-c', 'import main'), repeat
+        ),
+        'startup/help': measure(
+            lambda: run_python('main.py', '--help'), repeat
+        ),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=BASE_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old_report, new_report):
+    '''Отношение медиан нового и старого прогона.'''
+    print(ROW.format(name='benchmark', old='old, s', new='new, s', ratio='x'))
+    for name, new in new_report['benchmarks'].items():
+        old = old_report['benchmarks'].get(name)
+        if old is None:
+            continue
+        print(ROW.format(
+            name=name,
+            old=f'{old["median"]:.4f}',
+            new=f'{new["median"]:.4f}',
+            ratio=f'{new["median"] / old["median"]:.2f}'
+        ))
+
+
+def run(corpus_dir, repeat, cli_args):
+    server = serve(corpus_dir)
+    base_url = 'http://127.0.0.1:{}/'.format(server.server_address[1])
+    modes.MAIN_DOC_URL = base_url + 'docs.python.org/3/'
+    modes.PEPS_MAIN_URL = base_url + 'peps.python.org/'
+    modes.PEPS_JSON_URL = modes.PEPS_MAIN_URL + 'api/peps.json'
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            work_dir = Path(work_dir)
+            benchmarks = bench_modes(work_dir, repeat, cli_args)
+            benchmarks.update(bench_utils(work_dir, repeat))
+            benchmarks.update(bench_startup(repeat))
+    finally:
+        server.shutdown()
+        server.server_close()
+    return dict(
+        meta=dict(
+            commit=git_commit(),
+            python=platform.python_version(),
+            platform=platform.platform(),
+            corpus=str(corpus_dir),
+            workers=cli_args.workers,
+        ),
+        benchmarks=benchmarks
+    )
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--corpus', type=Path, default=CORPUS_DIR)
+    parser.add_argument('--peps', type=int, default=700)
+    parser.add_argument('--output', type=Path)
+    parser.add_argument('--compare', type=Path)
+    args = parser.parse_args()
+    cli_args = Namespace(workers=args.workers)
+    with tempfile.TemporaryDirectory() as tmp_corpus:
+        corpus_dir = args.corpus
+        if not corpus_dir.exists():
+            corpus_dir = Path(tmp_corpus)
+            synthesize(corpus_dir, peps=args.peps)
+        report = run(corpus_dir, args.repeat, cli_args)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.write_text(text, encoding='utf-8')
+    else:
+        print(text)
+    if args.compare:
+        compare(json.loads(args.compare.read_text(encoding='utf-8')), report)
+
+
+if __name__ == '__main__':
+    main_cli()
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from email.utils import formatdate
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REFRESH_ERROR = 'Не удалось обновить результаты {name}: {error}'
+NOT_FOUND = 'Нет такого ресурса: {path}'
+NOT_READY = 'Результаты {name} пока не получены'
+
+
+def json_body(data):
+    return json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+
+class ResultCache:
+    '''
+    Результаты режимов в памяти в виде готовых JSON-ответов.
+    Устаревший результат отдаётся сразу и обновляется в фоне
+    (stale-while-revalidate); до первой попытки загрузки запрос
+    ждёт её.
+    ETag меняется только при изменении данных.
+    '''
+
+    def __init__(self, producers, max_age):
+        self.producers = producers
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.refreshing = set()
+        self.attempted = {name: threading.Event() for name in producers}
+
+    def load(self, name):
+        header, *rows = [list(row) for row in self.producers[name]()]
+        body = json_body(dict(mode=name, header=header, rows=rows))
+        etag = '"{}"'.format(
+            hashlib.blake2b(body, digest_size=16).hexdigest()
+        )
+        entry = self.entries.get(name)
+        if entry is None or entry['etag'] != etag:
+            entry = dict(
+                body=body, etag=etag, last_modified=formatdate(usegmt=True)
+            )
+        self.entries[name] = dict(entry, fetched=time.monotonic())
+
+    def refresh(self, name):
+        try:
+            self.load(name)
+        except Exception as error:
+            logging.error(REFRESH_ERROR.format(name=name, error=error))
+        finally:
+            with self.lock:
+                self.refreshing.discard(name)
+            self.attempted[name].set()
+
+    def revalidate(self, name):
+        '''Обновление результата в фоновом потоке, если оно не идёт.'''
+        with self.lock:
+            if name in self.refreshing:
+                return
+            self.refreshing.add(name)
+        threading.Thread(
+            target=self.refresh, args=(name,), daemon=True
+        ).start()
+
+    def get(self, name):
+        '''Результат режима или None, если его не удалось получить.'''
+        entry = self.entries.get(name)
+        if entry is None:
+            self.revalidate(name)
+            self.attempted[name].wait()
+            return self.entries.get(name)
+        if time.monotonic() - entry['fetched'] > self.max_age:
+            self.revalidate(name)
+        return entry
+
+
+class ResultHandler(BaseHTTPRequestHandler):
+    '''JSON-ресурсы /<режим> с поддержкой If-None-Match.'''
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        logging.debug(format, *args)
+
+    def send_body(self, status, body, headers=()):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        cache = self.server.cache
+        name = self.path.split('?')[0].strip('/')
+        if not name:
+            return self.send_body(HTTPStatus.OK, json_body(dict(
+                endpoints=['/' + name for name in cache.producers]
+            )))
+        if name not in cache.producers:
+            return self.send_body(HTTPStatus.NOT_FOUND, json_body(dict(
+                error=NOT_FOUND.format(path=self.path)
+            )))
+        entry = cache.get(name)
+        if entry is None:
+            return self.send_body(
+                HTTPStatus.SERVICE_UNAVAILABLE,
+                json_body(dict(error=NOT_READY.format(name=name)))
+            )
+        headers = (
+            ('ETag', entry['etag']),
+            ('Last-Modified', entry['last_modified']),
+            ('Cache-Control', 'max-age={}'.format(cache.max_age)),
+        )
+        if self.headers.get('If-None-Match') == entry['etag']:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            for header, value in headers:
+                self.send_header(header, value)
+            self.end_headers()
+            return
+        self.send_body(HTTPStatus.OK, entry['body'], headers)
+
+
+def create_server(producers, host, port, max_age):
+    '''
+    HTTP-сервер результатов: producers сопоставляет имени ресурса
+    функцию без аргументов, возвращающую строки результата.
+    '''
+    server = ThreadingHTTPServer((host, port), ResultHandler)
+    server.daemon_threads = True
+    server.cache = ResultCache(producers, max_age)
+    return server
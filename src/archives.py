@@ -0,0 +1,193 @@
+import mmap
+import os
+import struct
+import zlib
+from contextlib import contextmanager
+
+from exceptions import ParserArchiveException
+from utils import read_json, write_json
+
+INDEX_SUFFIX = '.index.json'
+EOCD_SIGNATURE = b'PK\x05\x06'
+CENTRAL_SIGNATURE = b'PK\x01\x02'
+LOCAL_SIGNATURE = b'PK\x03\x04'
+# Конец центрального каталога, запись каталога и локальный заголовок.
+EOCD = struct.Struct('<4s4H2LH')
+CENTRAL = struct.Struct('<4s6H3L5H2L')
+LOCAL = struct.Struct('<4s5H3L2H')
+MAX_COMMENT = 0xFFFF
+ZIP64_LIMIT = 0xFFFFFFFF
+UTF8_FLAG = 0x800
+STORED = 0
+DEFLATED = 8
+NOT_ZIP_ERROR = 'Не найден центральный каталог zip-архива: {path}'
+ZIP64_ERROR = 'Архивы zip64 не поддерживаются: {path}'
+MEMBER_ERROR = 'Повреждена запись {name} в архиве {path}'
+METHOD_ERROR = 'Неподдерживаемый метод сжатия {method} у {name} в {path}'
+CRC_ERROR = 'Не совпала контрольная сумма {name} в архиве {path}'
+NO_MEMBER = 'В архиве {path} нет файла {name}'
+
+
+@contextmanager
+def mapped(path):
+    '''
+    Архив, отображённый в память только для чтения.
+    Пустой файл не отображается: это не zip-архив.
+    '''
+    with open(path, 'rb') as file:
+        if not os.fstat(file.fileno()).st_size:
+            raise ParserArchiveException(NOT_ZIP_ERROR.format(path=path))
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield data
+
+
+def end_of_directory(data, path):
+    '''Размер и смещение центрального каталога из записи EOCD.'''
+    start = data.rfind(
+        EOCD_SIGNATURE, max(0, len(data) - EOCD.size - MAX_COMMENT)
+    )
+    if start < 0 or start + EOCD.size > len(data):
+        raise ParserArchiveException(NOT_ZIP_ERROR.format(path=path))
+    _, _, _, _, count, size, offset, _ = EOCD.unpack_from(data, start)
+    if ZIP64_LIMIT in (size, offset) or count == MAX_COMMENT:
+        raise ParserArchiveException(ZIP64_ERROR.format(path=path))
+    if offset + size > start:
+        raise ParserArchiveException(NOT_ZIP_ERROR.format(path=path))
+    return count, offset, offset + size
+
+
+def central_directory(data, path):
+    '''
+    Записи центрального каталога: имя, смещение локального
+    заголовка, сжатый и исходный размер, CRC и метод сжатия.
+    '''
+    count, position, end = end_of_directory(data, path)
+    for _ in range(count):
+        if position + CENTRAL.size > end:
+            raise ParserArchiveException(NOT_ZIP_ERROR.format(path=path))
+        (
+            signature, _, _, flags, method, _, _, crc, compressed, size,
+            name_length, extra_length, comment_length, _, _, _, offset
+        ) = CENTRAL.unpack_from(data, position)
+        if signature != CENTRAL_SIGNATURE:
+            raise ParserArchiveException(NOT_ZIP_ERROR.format(path=path))
+        if ZIP64_LIMIT in (compressed, size, offset):
+            raise ParserArchiveException(ZIP64_ERROR.format(path=path))
+        position += CENTRAL.size
+        name = data[position:position + name_length].decode(
+            'utf-8' if flags & UTF8_FLAG else 'cp437'
+        )
+        position += name_length + extra_length + comment_length
+        yield name, offset, compressed, size, crc, method
+
+
+def data_offset(data, path, name, offset, compressed, directory_offset):
+    '''
+    Быстрая проверка записи по локальному заголовку без распаковки:
+    сигнатура и границы сжатых данных.
+    '''
+    if offset + LOCAL.size > directory_offset:
+        raise ParserArchiveException(
+            MEMBER_ERROR.format(name=name, path=path)
+        )
+    signature, *_, name_length, extra_length = LOCAL.unpack_from(data, offset)
+    start = offset + LOCAL.size + name_length + extra_length
+    if (
+        signature != LOCAL_SIGNATURE
+        or start + compressed > directory_offset
+    ):
+        raise ParserArchiveException(
+            MEMBER_ERROR.format(name=name, path=path)
+        )
+    return start
+
+
+def build_manifest(path):
+    '''
+    Манифест zip-архива по центральному каталогу: для каждого файла
+    смещение данных, сжатый и исходный размер, CRC и метод сжатия.
+    '''
+    with mapped(path) as data:
+        _, directory_offset, _ = end_of_directory(data, path)
+        members = {
+            name: [
+                data_offset(
+                    data, path, name, offset, compressed, directory_offset
+                ),
+                compressed, size, crc, method
+            ]
+            for name, offset, compressed, size, crc, method
+            in central_directory(data, path)
+        }
+    stat = path.stat()
+    return dict(
+        size=stat.st_size, mtime_ns=stat.st_mtime_ns, members=members
+    )
+
+
+def index_path(path):
+    '''Путь к манифесту рядом с архивом.'''
+    return path.with_name(path.name + INDEX_SUFFIX)
+
+
+def archive_manifest(path):
+    '''
+    Манифест архива: сохранённый переиспользуется, пока архив
+    не изменился, иначе строится заново и сохраняется.
+    '''
+    manifest = read_json(index_path(path))
+    stat = path.stat()
+    if (
+        manifest.get('size') == stat.st_size
+        and manifest.get('mtime_ns') == stat.st_mtime_ns
+    ):
+        return manifest
+    manifest = build_manifest(path)
+    write_json(index_path(path), manifest)
+    return manifest
+
+
+def member_bytes(data, path, name, member):
+    '''Распаковка одного файла с проверкой контрольной суммы.'''
+    start, compressed, size, crc, method = member
+    raw = data[start:start + compressed]
+    if method == STORED:
+        content = raw
+    elif method == DEFLATED:
+        try:
+            content = zlib.decompress(raw, -zlib.MAX_WBITS)
+        except zlib.error:
+            raise ParserArchiveException(
+                MEMBER_ERROR.format(name=name, path=path)
+            )
+    else:
+        raise ParserArchiveException(
+            METHOD_ERROR.format(method=method, name=name, path=path)
+        )
+    if len(content) != size or zlib.crc32(content) != crc:
+        raise ParserArchiveException(CRC_ERROR.format(name=name, path=path))
+    return content
+
+
+def read_member(path, name, manifest=None):
+    '''
+    Чтение одного файла из архива без распаковки остальных:
+    данные берутся по смещению из манифеста.
+    '''
+    members = (manifest or archive_manifest(path))['members']
+    if name not in members:
+        raise KeyError(NO_MEMBER.format(path=path, name=name))
+    with mapped(path) as data:
+        return member_bytes(data, path, name, members[name])
+
+
+def verify_archive(path, manifest=None):
+    '''
+    Полная проверка архива: распаковка каждого файла в памяти
+    и сверка размера и CRC с манифестом.
+    '''
+    members = (manifest or archive_manifest(path))['members']
+    with mapped(path) as data:
+        for name, member in members.items():
+            member_bytes(data, path, name, member)
+    return len(members)
@@ -3,10 +3,24 @@ import logging
 import sys
 from logging.handlers import RotatingFileHandler
 
-from constants import (DATETIME_FORMAT, LOG_DIR, LOG_FILE, OUTPUT_FILE,
-                       OUTPUT_PRETTY)
+from constants import (ALL_MODES, CACHE_FILESYSTEM, CACHE_MEMORY, CACHE_SIZE,
+                       CACHE_SQLITE, DATETIME_FORMAT, LOG_DIR, LOG_FILE,
+                       OUTPUT_ARROW, OUTPUT_FILE, OUTPUT_PARQUET,
+                       OUTPUT_PRETTY, OUTPUT_SQLITE, PARSE_PROCS, SEGMENTS,
+                       SERVE_HOST, SERVE_MAX_AGE, SERVE_PORT, WORKERS)
 
 LOG_FORMAT = '"%(asctime)s - [%(levelname)s] - %(message)s"'
+POSITIVE_INT_ERROR = 'Ожидается целое положительное число, получено: {value}'
+
+
+def positive_int(value):
+    '''Проверка, что аргумент - целое положительное число.'''
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(
+            POSITIVE_INT_ERROR.format(value=value)
+        )
+    return number
 
 
 def configure_argument_parser(available_modes):
@@ -14,6 +28,7 @@ def configure_argument_parser(available_modes):
     parser = argparse.ArgumentParser(description='Парсер документации Python')
     parser.add_argument(
         'mode',
+        nargs='+',
         choices=available_modes,
         help='Режимы работы парсера'
     )
@@ -23,17 +38,154 @@ def configure_argument_parser(available_modes):
         action='store_true',
         help='Очистка кеша'
     )
+    parser.add_argument(
+        '--cache-backend',
+        choices=(CACHE_SQLITE, CACHE_FILESYSTEM, CACHE_MEMORY),
+        default=CACHE_SQLITE,
+        help='Хранилище кеша HTTP-ответов'
+    )
+    parser.add_argument(
+        '--cache-expire',
+        action='append',
+        metavar='PATTERN=SECONDS',
+        help='Срок хранения в кеше страниц, подходящих под шаблон'
+    )
+    parser.add_argument(
+        '--cache-size',
+        type=int,
+        default=CACHE_SIZE,
+        help='Максимальный размер кеша в мегабайтах, 0 - без ограничения'
+    )
     parser.add_argument(
         '-o',
         '--output',
-        choices=(OUTPUT_PRETTY, OUTPUT_FILE),
+        choices=(
+            OUTPUT_PRETTY, OUTPUT_FILE, OUTPUT_PARQUET, OUTPUT_ARROW,
+            OUTPUT_SQLITE
+        ),
         help='Дополнительные способы вывода данных'
     )
+    parser.add_argument(
+        '--page-size',
+        type=positive_int,
+        help='Повторять заголовок таблицы pretty через столько строк'
+    )
+    parser.add_argument(
+        '--max-width',
+        type=positive_int,
+        help='Обрезать ячейки таблицы pretty до этой ширины'
+    )
+    parser.add_argument(
+        '-w',
+        '--workers',
+        type=positive_int,
+        default=WORKERS,
+        help='Количество параллельных загрузок страниц'
+    )
+    parser.add_argument(
+        '-p',
+        '--parse-procs',
+        type=positive_int,
+        default=PARSE_PROCS,
+        help='Количество процессов для разбора HTML-страниц'
+    )
+    parser.add_argument(
+        '--rate-limit',
+        action='store_true',
+        help='Подстраивать частоту запросов к каждому хосту под его ответы'
+    )
+    parser.add_argument(
+        '-s',
+        '--stream',
+        action='store_true',
+        help='Потоковое чтение статуса из карточек PEP'
+    )
+    parser.add_argument(
+        '-i',
+        '--incremental',
+        action='store_true',
+        help='Загружать только новые и изменившиеся карточки PEP'
+    )
+    parser.add_argument(
+        '--cards',
+        action='store_true',
+        help='Сверять статусы по карточкам PEP вместо api/peps.json'
+    )
+    parser.add_argument(
+        '-t',
+        '--target',
+        choices=[
+            mode for mode in available_modes or () if mode != ALL_MODES
+        ],
+        help='Режим, по результатам которого строится история'
+    )
+    parser.add_argument(
+        '-k',
+        '--key',
+        help='Ключ строки результата для режима history'
+    )
+    parser.add_argument(
+        '--since',
+        help='Сравнить с последним запуском не позднее этой даты'
+    )
+    parser.add_argument(
+        '--formats',
+        action='store_true',
+        help='Скачать архивы документации во всех форматах'
+    )
+    parser.add_argument(
+        '--segments',
+        type=positive_int,
+        default=SEGMENTS,
+        help='Количество параллельных частей загрузки большого файла'
+    )
+    parser.add_argument(
+        '--verify',
+        action='store_true',
+        help='Проверить контрольные суммы всех файлов в zip-архиве'
+    )
+    parser.add_argument(
+        '--interval',
+        action='append',
+        metavar='SOURCE=SECONDS',
+        help='Интервал проверки источника в режиме watch'
+    )
+    parser.add_argument(
+        '--host',
+        default=SERVE_HOST,
+        help='Адрес HTTP API в режиме serve'
+    )
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=SERVE_PORT,
+        help='Порт HTTP API в режиме serve'
+    )
+    parser.add_argument(
+        '--max-age',
+        type=positive_int,
+        default=SERVE_MAX_AGE,
+        help='Через сколько секунд результаты API обновляются в фоне'
+    )
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Сохранить отчёт о времени работы по фазам'
+    )
+    parser.add_argument(
+        '--cprofile',
+        action='store_true',
+        help='Дополнительно сохранить дамп cProfile'
+    )
     return parser
 
 
 def configure_logging():
-    '''Конфигурация логирования.'''
+    '''
+    Конфигурация логирования. В консоль лог выводится в stderr,
+    чтобы stdout содержал только результаты (например, JSON Lines
+    режима watch).
+    '''
     LOG_DIR.mkdir(exist_ok=True)
     rotating_handler = RotatingFileHandler(
         LOG_FILE, maxBytes=10 ** 6, backupCount=5
@@ -42,5 +194,5 @@ def configure_logging():
         datefmt=DATETIME_FORMAT,
         format=LOG_FORMAT,
         level=logging.INFO,
-        handlers=(rotating_handler, logging.StreamHandler(sys.stdout))
+        handlers=(rotating_handler, logging.StreamHandler(sys.stderr))
     )
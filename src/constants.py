@@ -1,7 +1,9 @@
+from datetime import timedelta
 from pathlib import Path
 
 MAIN_DOC_URL = 'https://docs.python.org/3/'
 PEPS_MAIN_URL = 'https://peps.python.org/'
+PEPS_JSON_URL = PEPS_MAIN_URL + 'api/peps.json'
 
 BASE_DIR = Path(__file__).parent
 
@@ -9,10 +11,66 @@ DATETIME_FORMAT = '%Y-%m-%d_%H-%M-%S'
 
 EXPECTED_STATUS = {}
 
+ALL_MODES = 'all'
+
+WORKERS = 1
+PARSE_PROCS = 1
+CHUNK_SIZE = 8 * 1024
+SEGMENTS = 4
+SEGMENT_MIN_SIZE = 8 * 1024 * 1024
+DOWNLOAD_WORKERS = 2
+
+REQUEST_TIMEOUT = 30
+RETRIES = 5
+BACKOFF_FACTOR = 0.5
+BACKOFF_JITTER = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+POOL_SIZE = 10
+
+RATE = 10
+MIN_RATE = 0.5
+MAX_RATE = 100
+LATENCY_TOLERANCE = 2
+THROTTLE_STATUSES = (429, 503)
+
+CACHE_NAME = 'http_cache'
+CACHE_ACCESS_LOG = 'http_cache_access.json'
+CACHE_SQLITE = 'sqlite'
+CACHE_FILESYSTEM = 'filesystem'
+CACHE_MEMORY = 'memory'
+CACHE_SIZE = 0
+CACHE_EXPIRE_AFTER = {
+    'peps.python.org/pep-*': timedelta(days=30),
+    'peps.python.org/': timedelta(hours=1),
+    'docs.python.org/3/whatsnew/*': timedelta(days=7),
+    'docs.python.org/3/download.html': timedelta(days=1),
+    'docs.python.org/3/': timedelta(hours=6),
+}
+
+WATCH_INTERVALS = {
+    'pep': 15 * 60,
+    'latest-versions': 60 * 60,
+    'whats-new': 60 * 60,
+}
+
+SERVE_HOST = '127.0.0.1'
+SERVE_PORT = 8000
+SERVE_MAX_AGE = 5 * 60
 
 OUTPUT_FILE = 'file'
 OUTPUT_PRETTY = 'pretty'
+OUTPUT_PARQUET = 'parquet'
+OUTPUT_ARROW = 'arrow'
+OUTPUT_SQLITE = 'sqlite'
+BATCH_SIZE = 1024
+TABLE_SAMPLE = 1000
 LOG_DIR = BASE_DIR / 'logs'
 LOG_FILE = LOG_DIR / 'parser.log'
 DOWNLOADS = 'downloads'
 RESULTS = 'results'
+RESULTS_DB = 'results.sqlite3'
+SNAPSHOTS = 'snapshots'
+PROFILES = 'profiles'
+PEP_SNAPSHOT = 'pep.json'
+MANIFEST = 'manifest.json'
+RECORDS = 'records.json'
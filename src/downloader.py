@@ -0,0 +1,219 @@
+import hashlib
+import os
+import threading
+
+from requests import RequestException
+
+from constants import CHUNK_SIZE, SEGMENT_MIN_SIZE
+from utils import (NO_STORE, RESPONSE_ERROR, load_in_threads, read_json,
+                   write_json)
+
+INCOMPLETE_ERROR = (
+    'Файл {url} загружен не полностью: получено {size} из {length} байт.'
+)
+RANGE_ERROR = 'Сервер не вернул запрошенный диапазон файла {url}.'
+PART_SUFFIX = '.part'
+META_SUFFIX = '.json'
+# Способ прерванной загрузки в метаданных: от него зависит,
+# как продолжать загрузку по временному файлу.
+PARTIAL_STREAM = 'stream'
+PARTIAL_SEGMENTS = 'segments'
+
+
+def file_sha256(path, chunk_size=CHUNK_SIZE):
+    '''Контрольная сумма файла, прочитанного по частям.'''
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest
+
+
+def remote_meta(session, url):
+    '''ETag и размер файла на сервере по HEAD-запросу.'''
+    try:
+        response = session.head(url, headers=NO_STORE, allow_redirects=True)
+    except RequestException as error:
+        raise ConnectionError(RESPONSE_ERROR.format(url=url, error=error))
+    length = response.headers.get('Content-Length')
+    return dict(
+        etag=response.headers.get('ETag'),
+        length=int(length) if length else None,
+        ranges=response.headers.get('Accept-Ranges') == 'bytes'
+    )
+
+
+def is_current(path, meta, remote):
+    '''Локальный файл совпадает с файлом на сервере и не повреждён.'''
+    if not path.exists() or not meta.get('sha256'):
+        return False
+    if remote['etag'] is None and remote['length'] is None:
+        return False
+    return (
+        meta.get('etag') == remote['etag']
+        and meta.get('length') == remote['length']
+        and path.stat().st_size == meta['length']
+        and file_sha256(path).hexdigest() == meta['sha256']
+    )
+
+
+def download_stream(session, url, part_path, meta, remote, chunk_size):
+    '''
+    Загрузка файла одним потоком с продолжением прерванной
+    загрузки. Возвращает размер и контрольную сумму файла.
+    '''
+    headers = dict(NO_STORE)
+    offset = 0
+    if (
+        part_path.exists()
+        and remote['etag'] is not None
+        and meta.get('partial') == PARTIAL_STREAM
+        and meta.get('partial_etag') == remote['etag']
+    ):
+        offset = part_path.stat().st_size
+        headers.update({
+            'Range': f'bytes={offset}-',
+            'If-Range': remote['etag']
+        })
+    try:
+        with session.get(url, headers=headers, stream=True) as response:
+            response.raise_for_status()
+            if response.status_code == 206:
+                digest = file_sha256(part_path, chunk_size)
+                mode = 'ab'
+            else:
+                digest, offset, mode = hashlib.sha256(), 0, 'wb'
+            size = offset
+            with open(part_path, mode) as file:
+                for chunk in response.iter_content(chunk_size):
+                    file.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+    except RequestException as error:
+        raise ConnectionError(RESPONSE_ERROR.format(url=url, error=error))
+    return size, digest
+
+
+def segment_ranges(length, segments):
+    '''Границы (включительно) частей файла длиной length.'''
+    step = -(-length // segments)
+    return [
+        (start, min(start + step, length) - 1)
+        for start in range(0, length, step)
+    ]
+
+
+def download_segment(session, url, part_path, segment, etag, chunk_size):
+    '''Загрузка части файла запросом Range в своё место файла.'''
+    start, end = segment
+    headers = dict(NO_STORE, Range=f'bytes={start}-{end}')
+    if etag:
+        headers['If-Range'] = etag
+    length = remaining = end + 1 - start
+    try:
+        with session.get(url, headers=headers, stream=True) as response:
+            response.raise_for_status()
+            if response.status_code != 206:
+                raise ConnectionError(RANGE_ERROR.format(url=url))
+            with open(part_path, 'r+b') as file:
+                file.seek(start)
+                for chunk in response.iter_content(chunk_size):
+                    chunk = chunk[:remaining]
+                    file.write(chunk)
+                    remaining -= len(chunk)
+    except RequestException as error:
+        raise ConnectionError(RESPONSE_ERROR.format(url=url, error=error))
+    if remaining:
+        raise ConnectionError(INCOMPLETE_ERROR.format(
+            url=url, size=length - remaining, length=length
+        ))
+
+
+def segments_meta(remote, done):
+    '''Метаданные загрузки частями: загруженные части файла.'''
+    return dict(
+        partial=PARTIAL_SEGMENTS, partial_etag=remote['etag'],
+        segments=sorted(done)
+    )
+
+
+def download_segments(session, url, part_path, meta_path, meta, remote,
+                      segments, chunk_size):
+    '''
+    Загрузка файла параллельными частями. Загруженные части
+    отмечаются в метаданных, прерванная загрузка продолжается
+    с недостающих частей, если сервер отдаёт ETag и он не изменился.
+    Возвращает размер и контрольную сумму.
+    '''
+    length = remote['length']
+    done = set()
+    if (
+        remote['etag'] is not None
+        and part_path.exists()
+        and part_path.stat().st_size == length
+        and meta.get('partial') == PARTIAL_SEGMENTS
+        and meta.get('partial_etag') == remote['etag']
+    ):
+        done.update(meta.get('segments', ()))
+    else:
+        write_json(meta_path, segments_meta(remote, done))
+        with open(part_path, 'wb') as file:
+            file.truncate(length)
+    lock = threading.Lock()
+
+    def load(index, segment):
+        if index not in done:
+            download_segment(
+                session, url, part_path, segment, remote['etag'], chunk_size
+            )
+        with lock:
+            done.add(index)
+            write_json(meta_path, segments_meta(remote, done))
+
+    list(load_in_threads(
+        lambda item: load(*item),
+        enumerate(segment_ranges(length, segments)),
+        segments
+    ))
+    return length, file_sha256(part_path, chunk_size)
+
+
+def download_file(session, url, path, chunk_size=CHUNK_SIZE, segments=1):
+    '''
+    Потоковая загрузка файла во временный файл с атомарным
+    переименованием. Прерванная загрузка продолжается запросом
+    Range, актуальный файл повторно не загружается. Если сервер
+    поддерживает Range, файлы от SEGMENT_MIN_SIZE байт загружаются
+    в segments параллельных частей.
+    Возвращает False, если загрузка не потребовалась.
+    '''
+    meta_path = path.with_name(path.name + META_SUFFIX)
+    part_path = path.with_name(path.name + PART_SUFFIX)
+    meta = read_json(meta_path)
+    remote = remote_meta(session, url)
+    if is_current(path, meta, remote):
+        return False
+    if (
+        segments > 1 and remote['ranges']
+        and (remote['length'] or 0) >= SEGMENT_MIN_SIZE
+    ):
+        size, digest = download_segments(
+            session, url, part_path, meta_path, meta, remote, segments,
+            chunk_size
+        )
+    else:
+        write_json(meta_path, dict(
+            partial=PARTIAL_STREAM, partial_etag=remote['etag']
+        ))
+        size, digest = download_stream(
+            session, url, part_path, meta, remote, chunk_size
+        )
+    if remote['length'] is not None and size != remote['length']:
+        raise ConnectionError(INCOMPLETE_ERROR.format(
+            url=url, size=size, length=remote['length']
+        ))
+    os.replace(part_path, path)
+    write_json(meta_path, dict(
+        etag=remote['etag'], length=size, sha256=digest.hexdigest()
+    ))
+    return True
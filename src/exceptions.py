@@ -1,3 +1,13 @@
 class ParserFindTagException(Exception):
     '''Вызывается, когда парсер не может найти тег.'''
     pass
+
+
+class ParserHistoryException(Exception):
+    '''Вызывается, когда в базе нет нужных результатов запусков.'''
+    pass
+
+
+class ParserArchiveException(Exception):
+    '''Вызывается, когда загруженный архив повреждён.'''
+    pass
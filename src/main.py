@@ -1,157 +1,151 @@
 import logging
-import re
-from collections import defaultdict
-from urllib.parse import urljoin
+from argparse import Namespace
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
 
 from configs import configure_argument_parser, configure_logging
-from constants import BASE_DIR, DOWNLOADS, MAIN_DOC_URL, PEPS_MAIN_URL
+from constants import ALL_MODES, BASE_DIR, RECORDS, SNAPSHOTS
 from outputs import control_output
-from requests_cache import CachedSession
-from src.exceptions import ParserFindTagException
-from tqdm import tqdm
-from utils import find_tag, get_response, making_soup
+from profiling import run_profiled
 
 ARGUMENTS = 'Аргументы командной строки: {args}'
-DOWNLOAD_STATUS = 'Архив был загружен и сохранён: {archive_path}'
-ERROR_STATUS = (
-    '\nНесовпадающий статус: {url}.\n'
-    'Статус в карточке: {status_card}.\n'
-    'Ожидаемый статус: {status}.\n'
+CACHE_TRIMMED = 'Из кеша вытеснено ответов: {count}, размер кеша: {size} байт.'
+SESSION_STATS = (
+    'Повторы запросов: {retries}. '
+    'Соединений открыто: {connections}, запросов выполнено: {requests}. '
+    'Ограничения по хостам: {limits}.'
+)
+RECORDS_STATS = (
+    'Записей из кеша разбора: {hits}, разобрано страниц: {misses}.'
 )
 MESSAGE_ERROR = 'Сбой в работе программы: {error}'
-DATA_ERROR = 'Не найден список c версиями Python.'
+MODE_ERROR = 'Сбой в режиме {mode}: {error}'
 PARSER_START = 'Парсер запущен!'
 PARSER_END = 'Парсер завершил работу.'
+MEGABYTE = 1024 * 1024
+MODES = '.modes' if __package__ else 'modes'
+BATCH_MODES = ('whats-new', 'latest-versions', 'download', 'pep')
 
 
-def whats_new(session):
+def lazy_mode(name):
     '''
-    Парсинг информации из статей о нововведениях в Python.
+    Режим парсера из модуля modes. Модуль с его зависимостями
+    (requests_cache, bs4, lxml, tqdm) импортируется при первом вызове,
+    поэтому справка и ошибки в аргументах не ждут этих импортов.
     '''
-    logs = ''
-    whats_new_url = urljoin(MAIN_DOC_URL, 'whatsnew/')
-    results = [('Ссылка на статью', 'Заголовок', 'Редактор, Автор')]
-    for url in tqdm(
-        making_soup(session, whats_new_url)
-        .select('li.toctree-l1 > a[href!="changelog.html"]')
-    ):
-        version_link = urljoin(whats_new_url, url['href'])
-        try:
-            soup = making_soup(session, version_link)
-        except ConnectionError as error:
-            logs += error
-            continue
-        results.append((
-            version_link,
-            find_tag(soup, 'h1').text,
-            find_tag(soup, 'dl').text.replace('\n', ' ')
-        ))
-    if logs:
-        logging.error(logs)
-    return results
+    def mode(session, cli_args=None):
+        return getattr(
+            import_module(MODES, __package__), name
+        )(session, cli_args)
+
+    mode.__name__ = mode.__qualname__ = name
+    return mode
+
+
+whats_new = lazy_mode('whats_new')
+whats_new_peps = lazy_mode('whats_new_peps')
+latest_versions = lazy_mode('latest_versions')
+download = lazy_mode('download')
+pep = lazy_mode('pep')
+pep_meta = lazy_mode('pep_meta')
+history = lazy_mode('history')
+diff = lazy_mode('diff')
+watch = lazy_mode('watch')
+serve = lazy_mode('serve')
+
+MODE_TO_FUNCTION = {
+    'whats-new': whats_new,
+    'whats-new-peps': whats_new_peps,
+    'latest-versions': latest_versions,
+    'download': download,
+    'pep': pep,
+    'pep-meta': pep_meta,
+    'history': history,
+    'diff': diff,
+    'watch': watch,
+    'serve': serve
+}
 
 
-def latest_versions(session):
+def run_mode(session, cli_args):
     '''
-    Парсинг статусов версий Python.
+    Запуск режима парсера и вывод его результатов.
     '''
-    soup = making_soup(session, MAIN_DOC_URL)
-    ul_tags = soup.select('.sphinxsidebarwrapper ul')
-    for ul in ul_tags:
-        if 'All versions' in ul.text:
-            a_tags = ul.find_all('a')
-            break
-        else:
-            logging.error(DATA_ERROR, exc_info=True)
-            raise ParserFindTagException(DATA_ERROR)
-    results = [('Ссылка на документацию', 'Версия', 'Статус')]
-    pattern = r'Python (?P<version>\d\.\d+) \((?P<status>.*)\)'
-    for a_tag in a_tags:
-        text_match = re.search(pattern, a_tag.text)
-        if text_match:
-            version, status = text_match.groups()
-        else:
-            version, status = a_tag.text, ''
-        results.append((a_tag['href'], version, status))
-    return results
+    results = MODE_TO_FUNCTION[cli_args.mode](session, cli_args)
+    if results:
+        control_output(results, cli_args)
 
 
-def download(session):
-    '''
-    Парсинг - скачивает архив документации Python.
-    '''
-    downloads_url = urljoin(MAIN_DOC_URL, 'download.html')
-    soup = making_soup(session, downloads_url)
-    archive_url = urljoin(
-        downloads_url,
-        soup.select_one('table.docutils a[href$="pdf-a4.zip"]')['href']
-    )
-    DOWNLOADS_DIR = BASE_DIR / DOWNLOADS
-    DOWNLOADS_DIR.mkdir(exist_ok=True)
-    archive_path = DOWNLOADS_DIR / archive_url.split('/')[-1]
-    response = get_response(session, archive_url)
-    with open(archive_path, 'wb') as file:
-        file.write(response.content)
-    logging.info(DOWNLOAD_STATUS.format(archive_path=archive_path))
-
-
-def pep(session):
+def batch_modes(modes):
     '''
-    Парсинг - подсчет общего количества РЕР и в каждом статусе.
+    Режимы пакетного запуска без повторов; all - все режимы парсинга.
     '''
-    quantity_peps = defaultdict(int)
-    logs = ''
-    for tag in tqdm(
-        making_soup(session, PEPS_MAIN_URL).select('#numerical-index tr')[1:]
-    ):
-        status = tag.select_one('abbr')['title'].split()[-1]
-        pep_url = urljoin(PEPS_MAIN_URL, tag.select_one('a')['href'])
-        try:
-            soup = making_soup(session, pep_url)
-        except ConnectionError as error:
-            logs += error
-            continue
-        pep_status = (
-            soup.find(string='Status').find_parent().find_next_sibling().text
-        )
-        if status != pep_status:
-            logs += ERROR_STATUS.format(
-                url=pep_url,
-                status_card=pep_status,
-                status=status
-            )
-        quantity_peps[pep_status] += 1
-    if logs:
-        logging.error(logs)
-    return (
-        ('Статус', 'Количество'),
-        *quantity_peps.items(),
-        ('Total', sum(quantity_peps.values()))
-    )
+    if ALL_MODES in modes:
+        return list(BATCH_MODES)
+    return list(dict.fromkeys(modes))
 
 
-MODE_TO_FUNCTION = {
-    'whats-new': whats_new,
-    'latest-versions': latest_versions,
-    'download': download,
-    'pep': pep
-}
+def run_modes(session, cli_args, modes):
+    '''
+    Запуск нескольких режимов в одном процессе с общей сессией
+    и общим кешем записей (session.records). Режимы выполняются
+    параллельно, результаты каждого выводятся через control_output
+    в порядке режимов; сбой одного режима или вывода его результатов
+    не прерывает остальные. До вывода результаты режима целиком
+    хранятся в памяти.
+    '''
+    runs = [Namespace(**{**vars(cli_args), 'mode': mode}) for mode in modes]
+    if len(runs) == 1:
+        return run_mode(session, runs[0])
+
+    def collect(mode_args):
+        results = MODE_TO_FUNCTION[mode_args.mode](session, mode_args)
+        return list(results) if results else None
+
+    with ThreadPoolExecutor(max_workers=len(runs)) as executor:
+        futures = [executor.submit(collect, mode_args) for mode_args in runs]
+        for mode_args, future in zip(runs, futures):
+            try:
+                results = future.result()
+                if results:
+                    control_output(results, mode_args)
+            except Exception as error:
+                logging.error(MODE_ERROR.format(
+                    mode=mode_args.mode, error=error
+                ))
 
 
 def main():
     configure_logging()
     logging.info(PARSER_START)
     try:
-        arg_parser = configure_argument_parser(MODE_TO_FUNCTION.keys())
+        arg_parser = configure_argument_parser(
+            [*MODE_TO_FUNCTION, ALL_MODES]
+        )
         args = arg_parser.parse_args()
         logging.info(ARGUMENTS.format(args=args))
-        session = CachedSession()
+        # Сессия и кеш разбора нужны только после разбора аргументов.
+        from records import RecordCache
+        from sessions import create_session, session_stats, trim_cache
+        session = create_session(args)
+        session.records = RecordCache(BASE_DIR / SNAPSHOTS / RECORDS)
         if args.clear_cache:
             session.cache.clear()
-        parser_mode = args.mode
-        results = MODE_TO_FUNCTION[parser_mode](session)
-        if results:
-            control_output(results, args)
+            session.records.clear()
+        modes = batch_modes(args.mode)
+        args.mode = '+'.join(modes)
+        if args.profile or args.cprofile:
+            run_profiled(run_modes, args, session, args, modes)
+        else:
+            run_modes(session, args, modes)
+        session.records.save()
+        logging.info(RECORDS_STATS.format(
+            hits=session.records.hits, misses=session.records.misses
+        ))
+        if args.cache_size:
+            count, size = trim_cache(session, args.cache_size * MEGABYTE)
+            logging.info(CACHE_TRIMMED.format(count=count, size=size))
+        logging.info(SESSION_STATS.format(**session_stats(session)))
     except Exception as error:
         logging.error(MESSAGE_ERROR.format(error=error))
     logging.info(PARSER_END)
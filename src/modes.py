@@ -0,0 +1,796 @@
+import datetime as dt
+import json
+import logging
+import re
+import time
+from collections import defaultdict
+from contextlib import closing
+from functools import partial
+from urllib.parse import urljoin
+
+from api import create_server
+from archives import archive_manifest, verify_archive
+from constants import (BASE_DIR, DATETIME_FORMAT, DOWNLOAD_WORKERS,
+                       DOWNLOADS, MAIN_DOC_URL, MANIFEST,
+                       PARSE_PROCS, PEP_SNAPSHOT, PEPS_JSON_URL,
+                       PEPS_MAIN_URL, RESULTS_DB, SEGMENTS, SERVE_HOST,
+                       SERVE_MAX_AGE, SERVE_PORT, SNAPSHOTS, WATCH_INTERVALS,
+                       WORKERS)
+from downloader import META_SUFFIX, download_file
+from exceptions import (ParserArchiveException, ParserFindTagException,
+                        ParserHistoryException)
+from peps import PEP_FIELDS, PepMeta
+from storage import connect, diff_runs, key_history, last_runs, run_header
+from tqdm import tqdm
+from utils import (extract_record, fetch_records, find_tag,
+                   get_conditional_response, load_in_threads, making_soup,
+                   read_json, soup_from_text, stream_records, write_json)
+
+DOWNLOAD_STATUS = 'Архив был загружен и сохранён: {archive_path}'
+DOWNLOAD_SKIPPED = 'Архив не изменился, загрузка не требуется: {archive_path}'
+MANIFEST_STATUS = 'Манифест загрузок сохранён: {manifest_path}'
+ARCHIVE_STATUS = 'Файлов в архиве {archive_path}: {members}'
+VERIFY_STATUS = 'Контрольные суммы файлов архива совпали: {archive_path}'
+ARCHIVE_LINKS = (
+    'table.docutils a[href$=".zip"], table.docutils a[href$=".tar.bz2"]'
+)
+MEGABYTE = 1024 * 1024
+ERROR_STATUS = (
+    '\nНесовпадающий статус: {url}.\n'
+    'Статус в карточке: {status_card}.\n'
+    'Ожидаемый статус: {status}.\n'
+)
+ERROR_JSON_STATUS = (
+    '\nНесовпадающий статус: {url}.\n'
+    'Статус в {json_url}: {status_card}.\n'
+    'Ожидаемый статус: {status}.\n'
+)
+STATUS_NOT_FOUND = 'Не найден статус в карточке PEP.'
+PEP_NOT_IN_JSON = '\nPEP {url} нет в {json_url}.\n'
+JSON_FALLBACK = (
+    'Не удалось получить статусы из {json_url}: {error}. '
+    'Статусы проверяются по карточкам PEP.'
+)
+NO_RUNS = 'В базе нет результатов запусков режима {mode} для сравнения.'
+HISTORY_ARGS_ERROR = (
+    'Для режимов history и diff укажите --target, для history также --key.'
+)
+DATA_ERROR = 'Не найден список c версиями Python.'
+PEP_UNKNOWN = 'Нет в списке PEP'
+PEP_NUMBER = re.compile(r'/pep-(\d+)')
+VERSION_NUMBER = re.compile(r'\d+\.\d+')
+SERVE_STATUS = 'API запущен: http://{host}:{port}/'
+INTERVAL_ERROR = (
+    'Ожидается ИСТОЧНИК=СЕКУНДЫ, источники: {sources}; получено: {value}'
+)
+WATCH_PARSE_ERROR = 'Не удалось разобрать страницу {url}: {error!r}'
+NO_WATCH_SOURCES = (
+    'Все источники отключены интервалом 0, наблюдать нечего: {sources}.'
+)
+
+
+def fetch_options(cli_args):
+    '''
+    Параметры загрузки страниц из аргументов командной строки.
+    '''
+    return dict(
+        workers=getattr(cli_args, 'workers', WORKERS)
+    )
+
+
+def whats_new_article(text):
+    '''
+    Извлечение заголовка и редактора из статьи о нововведениях.
+    '''
+    soup = soup_from_text(text)
+    return (
+        find_tag(soup, 'h1').text,
+        find_tag(soup, 'dl').text.replace('\n', ' ')
+    )
+
+
+def whats_new_links(text):
+    '''
+    Ссылки на статьи о нововведениях.
+    '''
+    whats_new_url = urljoin(MAIN_DOC_URL, 'whatsnew/')
+    return [
+        urljoin(whats_new_url, url['href'])
+        for url in soup_from_text(text)
+        .select('li.toctree-l1 > a[href!="changelog.html"]')
+    ]
+
+
+def whats_new(session, cli_args=None):
+    '''
+    Парсинг информации из статей о нововведениях в Python.
+    Строки результата выдаются по мере обработки статей.
+    '''
+    logs = ''
+    yield ('Ссылка на статью', 'Заголовок', 'Редактор, Автор')
+    version_links = extract_record(
+        session, urljoin(MAIN_DOC_URL, 'whatsnew/'), whats_new_links
+    )
+    articles = fetch_records(
+        session,
+        version_links,
+        whats_new_article,
+        parse_procs=getattr(cli_args, 'parse_procs', PARSE_PROCS),
+        **fetch_options(cli_args)
+    )
+    for version_link, (article, error) in tqdm(
+        zip(version_links, articles), total=len(version_links)
+    ):
+        if error:
+            logs += str(error)
+            continue
+        yield (version_link, *article)
+    if logs:
+        logging.error(logs)
+
+
+def whats_new_peps_article(text):
+    '''
+    Заголовок статьи о нововведениях и номера упомянутых PEP
+    с разделом первого упоминания, собранные за один проход.
+    '''
+    soup = soup_from_text(text)
+    title = section = find_tag(soup, 'h1').text.rstrip('¶')
+    references = {}
+    for tag in soup.find_all(('h1', 'h2', 'h3', 'a')):
+        if tag.name != 'a':
+            section = tag.text.rstrip('¶')
+            continue
+        number = PEP_NUMBER.search(tag.get('href', ''))
+        if number:
+            references.setdefault(int(number[1]), section)
+    return title, list(references.items())
+
+
+def pep_number_index(rows):
+    '''
+    Статусы из общего списка PEP по номеру PEP.
+    '''
+    return {
+        int(PEP_NUMBER.search(pep_url)[1]): status
+        for status, pep_url in rows
+    }
+
+
+def whats_new_peps(session, cli_args=None):
+    '''
+    PEP из статей о нововведениях со статусом из общего списка PEP:
+    какие PEP вошли в каждую версию Python.
+    '''
+    logs = ''
+    yield ('Версия', 'PEP', 'Статус', 'Раздел', 'Ссылка на статью')
+    statuses = pep_number_index(
+        extract_record(session, PEPS_MAIN_URL, pep_index_rows)
+    )
+    version_links = extract_record(
+        session, urljoin(MAIN_DOC_URL, 'whatsnew/'), whats_new_links
+    )
+    articles = fetch_records(
+        session,
+        version_links,
+        whats_new_peps_article,
+        parse_procs=getattr(cli_args, 'parse_procs', PARSE_PROCS),
+        **fetch_options(cli_args)
+    )
+    for version_link, (article, error) in tqdm(
+        zip(version_links, articles), total=len(version_links)
+    ):
+        if error:
+            logs += str(error)
+            continue
+        title, references = article
+        version = VERSION_NUMBER.search(title)
+        for number, section in references:
+            yield (
+                version[0] if version else title, number,
+                statuses.get(number, PEP_UNKNOWN), section, version_link
+            )
+    if logs:
+        logging.error(logs)
+
+
+def version_rows(text):
+    '''
+    Ссылки на документацию, версии и статусы из боковой панели.
+    '''
+    ul_tags = soup_from_text(text).select('.sphinxsidebarwrapper ul')
+    for ul in ul_tags:
+        if 'All versions' in ul.text:
+            a_tags = ul.find_all('a')
+            break
+        else:
+            logging.error(DATA_ERROR, exc_info=True)
+            raise ParserFindTagException(DATA_ERROR)
+    pattern = r'Python (?P<version>\d\.\d+) \((?P<status>.*)\)'
+    rows = []
+    for a_tag in a_tags:
+        text_match = re.search(pattern, a_tag.text)
+        if text_match:
+            version, status = text_match.groups()
+        else:
+            version, status = a_tag.text, ''
+        rows.append((a_tag['href'], version, status))
+    return rows
+
+
+def latest_versions(session, cli_args=None):
+    '''
+    Парсинг статусов версий Python.
+    '''
+    rows = extract_record(session, MAIN_DOC_URL, version_rows)
+    yield ('Ссылка на документацию', 'Версия', 'Статус')
+    for row in rows:
+        yield tuple(row)
+
+
+def index_archive(archive_path, verify=False):
+    '''
+    Манифест zip-архива по центральному каталогу и, с --verify,
+    полная проверка контрольных сумм. Возвращает число файлов.
+    '''
+    manifest = archive_manifest(archive_path)
+    members = len(manifest['members'])
+    logging.info(
+        ARCHIVE_STATUS.format(archive_path=archive_path, members=members)
+    )
+    if verify:
+        verify_archive(archive_path, manifest)
+        logging.info(VERIFY_STATUS.format(archive_path=archive_path))
+    return members
+
+
+def download_formats(session, cli_args, archive_urls, downloads_dir):
+    '''
+    Параллельная загрузка архивов документации во всех форматах.
+    Выдаёт сводку по файлам: размер, время и скорость загрузки;
+    сведения о файлах сохраняются в манифест.
+    '''
+    options = fetch_options(cli_args)
+    segments = getattr(cli_args, 'segments', SEGMENTS)
+    verify = getattr(cli_args, 'verify', False)
+
+    def load(archive_url):
+        archive_path = downloads_dir / archive_url.split('/')[-1]
+        start = time.monotonic()
+        try:
+            downloaded = download_file(
+                session, archive_url, archive_path, segments=segments
+            )
+            seconds = time.monotonic() - start
+            members = (
+                index_archive(archive_path, verify)
+                if archive_path.suffix == '.zip' else None
+            )
+        except (ConnectionError, ParserArchiveException) as error:
+            return None, error
+        meta = read_json(
+            archive_path.with_name(archive_path.name + META_SUFFIX)
+        )
+        return dict(
+            file=archive_path.name,
+            url=archive_url,
+            size=meta['length'],
+            sha256=meta['sha256'],
+            etag=meta['etag'],
+            downloaded=downloaded,
+            members=members,
+            seconds=round(seconds, 3),
+            speed=round(meta['length'] / MEGABYTE / seconds, 2)
+            if downloaded and seconds else None
+        ), None
+
+    yield ('Файл', 'Размер, байт', 'Время, с', 'Скорость, МБ/с', 'Статус')
+    manifest = []
+    start = time.monotonic()
+    for entry, error in load_in_threads(
+        load, archive_urls, max(options['workers'], DOWNLOAD_WORKERS)
+    ):
+        if error:
+            logging.error(error)
+            continue
+        manifest.append(entry)
+        yield (
+            entry['file'], entry['size'], entry['seconds'], entry['speed'],
+            'загружен' if entry['downloaded'] else 'не изменился'
+        )
+    seconds = time.monotonic() - start
+    size = sum(entry['size'] for entry in manifest if entry['downloaded'])
+    manifest_path = downloads_dir / MANIFEST
+    write_json(manifest_path, dict(
+        created_at=dt.datetime.now().strftime(DATETIME_FORMAT),
+        files=manifest
+    ))
+    logging.info(MANIFEST_STATUS.format(manifest_path=manifest_path))
+    yield (
+        'Всего', size, round(seconds, 3),
+        round(size / MEGABYTE / seconds, 2) if size and seconds else None,
+        f'{len(manifest)} из {len(archive_urls)}'
+    )
+
+
+def download(session, cli_args=None):
+    '''
+    Парсинг - скачивает архив документации Python.
+    С --formats скачиваются архивы во всех форматах.
+    '''
+    downloads_url = urljoin(MAIN_DOC_URL, 'download.html')
+    soup = making_soup(session, downloads_url)
+    DOWNLOADS_DIR = BASE_DIR / DOWNLOADS
+    DOWNLOADS_DIR.mkdir(exist_ok=True)
+    if getattr(cli_args, 'formats', False):
+        return download_formats(session, cli_args, [
+            urljoin(downloads_url, link['href'])
+            for link in soup.select(ARCHIVE_LINKS)
+        ], DOWNLOADS_DIR)
+    archive_url = urljoin(
+        downloads_url,
+        soup.select_one('table.docutils a[href$="pdf-a4.zip"]')['href']
+    )
+    archive_path = DOWNLOADS_DIR / archive_url.split('/')[-1]
+    if download_file(
+        session, archive_url, archive_path,
+        segments=getattr(cli_args, 'segments', SEGMENTS)
+    ):
+        logging.info(DOWNLOAD_STATUS.format(archive_path=archive_path))
+    else:
+        logging.info(DOWNLOAD_SKIPPED.format(archive_path=archive_path))
+    try:
+        index_archive(archive_path, getattr(cli_args, 'verify', False))
+    except ParserArchiveException as error:
+        logging.error(error)
+
+
+def pep_card_status(text):
+    '''
+    Извлечение статуса из карточки PEP.
+    '''
+    return (
+        soup_from_text(text)
+        .find(string='Status').find_parent().find_next_sibling().text
+    )
+
+
+def pep_card_meta(text):
+    '''
+    Таблица заголовков карточки PEP: поле - значение.
+    Пробельные символы в значениях схлопываются.
+    '''
+    soup = soup_from_text(text)
+    header = {}
+    title = soup.select_one('h1.page-title')
+    if title is not None:
+        header['Title'] = ' '.join(title.text.split()).split(' – ', 1)[-1]
+    for field in soup.select('dl.rfc2822 > dt'):
+        value = field.find_next_sibling('dd')
+        header[field.text.rstrip(':').strip()] = (
+            '' if value is None else ' '.join(value.text.split())
+        )
+    return header
+
+
+def pep_card_row(text):
+    '''
+    Значения таблицы заголовков карточки PEP в порядке PEP_FIELDS
+    без номера; пустая строка, если поля нет в карточке.
+    '''
+    header = pep_card_meta(text)
+    return tuple(header.get(field, '') for field in PEP_FIELDS[1:])
+
+
+def pep_card_status_stream(elements):
+    '''
+    Извлечение статуса из карточки PEP по мере её разбора.
+    '''
+    status_found = False
+    for element in elements:
+        if element.tag == 'dt' and element.text == 'Status':
+            status_found = True
+        elif status_found and element.tag == 'dd':
+            return ''.join(element.itertext())
+    raise ParserFindTagException(STATUS_NOT_FOUND)
+
+
+def pep_cards_incremental(session, rows, cli_args=None):
+    '''
+    Статусы из карточек PEP с учётом снимка прошлого запуска.
+    Полностью загружаются только новые карточки и карточки, статус
+    которых в общем списке изменился; остальные проверяются условным
+    запросом и при ответе 304 берутся из снимка.
+    '''
+    snapshot_path = BASE_DIR / SNAPSHOTS / PEP_SNAPSHOT
+    snapshot = read_json(snapshot_path)
+    fresh_snapshot = {}
+
+    def load(row):
+        status, pep_url = row
+        card = snapshot.get(pep_url)
+        validators = {}
+        if card and card['status'] == status:
+            validators = dict(
+                etag=card['etag'], last_modified=card['last_modified']
+            )
+        try:
+            response = get_conditional_response(
+                session, pep_url, **validators
+            )
+        except ConnectionError as error:
+            return None, error
+        if response.status_code != 304:
+            card = dict(
+                status=status,
+                card_status=pep_card_status(response.text),
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified')
+            )
+        fresh_snapshot[pep_url] = card
+        return card['card_status'], None
+
+    options = fetch_options(cli_args)
+    cards = list(load_in_threads(load, rows, options['workers']))
+    write_json(snapshot_path, fresh_snapshot)
+    return cards
+
+
+def pep_index_rows(text):
+    '''
+    Статусы и ссылки на карточки из общего списка PEP.
+    '''
+    return [
+        (
+            tag.select_one('abbr')['title'].split()[-1],
+            urljoin(PEPS_MAIN_URL, tag.select_one('a')['href'])
+        )
+        for tag in soup_from_text(text).select('#numerical-index tr')[1:]
+    ]
+
+
+def pep_json_statuses(text):
+    '''
+    Номера и статусы PEP из машиночитаемого списка api/peps.json.
+    '''
+    return [
+        (int(number), pep['status'])
+        for number, pep in json.loads(text).items()
+    ]
+
+
+def pep_json_cards(session, rows):
+    '''
+    Статусы PEP из api/peps.json в порядке общего списка:
+    один запрос вместо загрузки каждой карточки.
+    '''
+    statuses = dict(
+        extract_record(session, PEPS_JSON_URL, pep_json_statuses)
+    )
+    cards = []
+    for _, pep_url in rows:
+        number = int(PEP_NUMBER.search(pep_url)[1])
+        cards.append(
+            (statuses[number], None) if number in statuses else (
+                None,
+                PEP_NOT_IN_JSON.format(url=pep_url, json_url=PEPS_JSON_URL)
+            )
+        )
+    return cards
+
+
+def pep_cards(session, rows, cli_args=None):
+    '''
+    Статусы из карточек PEP в порядке общего списка.
+    '''
+    pep_urls = [pep_url for _, pep_url in rows]
+    if getattr(cli_args, 'incremental', False):
+        return pep_cards_incremental(session, rows, cli_args)
+    if getattr(cli_args, 'stream', False):
+        return stream_records(
+            session,
+            pep_urls,
+            pep_card_status_stream,
+            **fetch_options(cli_args)
+        )
+    return fetch_records(
+        session,
+        pep_urls,
+        pep_card_status,
+        parse_procs=getattr(cli_args, 'parse_procs', PARSE_PROCS),
+        **fetch_options(cli_args)
+    )
+
+
+def pep_statuses(session, rows, cli_args=None):
+    '''
+    Статусы PEP для сверки с общим списком: из api/peps.json, а с
+    --cards, --stream, --incremental или при недоступности JSON -
+    из карточек PEP. Возвращает статусы и сообщение о несовпадении
+    статуса, в котором указан их источник.
+    '''
+    if not any(
+        getattr(cli_args, option, False)
+        for option in ('cards', 'stream', 'incremental')
+    ):
+        try:
+            return pep_json_cards(session, rows), ERROR_JSON_STATUS
+        except (ConnectionError, ValueError, KeyError) as error:
+            logging.warning(
+                JSON_FALLBACK.format(json_url=PEPS_JSON_URL, error=error)
+            )
+    return pep_cards(session, rows, cli_args), ERROR_STATUS
+
+
+def pep(session, cli_args=None):
+    '''
+    Парсинг - подсчет общего количества РЕР и в каждом статусе.
+    '''
+    quantity_peps = defaultdict(int)
+    logs = ''
+    rows = extract_record(session, PEPS_MAIN_URL, pep_index_rows)
+    cards, error_status = pep_statuses(session, rows, cli_args)
+    for (status, pep_url), (pep_status, error) in tqdm(
+        zip(rows, cards), total=len(rows)
+    ):
+        if error:
+            logs += str(error)
+            continue
+        if status != pep_status:
+            logs += error_status.format(
+                url=pep_url,
+                json_url=PEPS_JSON_URL,
+                status_card=pep_status,
+                status=status
+            )
+        quantity_peps[pep_status] += 1
+    if logs:
+        logging.error(logs)
+    yield ('Статус', 'Количество')
+    yield from quantity_peps.items()
+    yield ('Total', sum(quantity_peps.values()))
+
+
+def pep_meta_records(session, cli_args=None):
+    '''
+    Метаданные всех PEP из общего списка в виде компактных записей.
+    Записи выдаются по мере загрузки карточек.
+    '''
+    logs = ''
+    pep_urls = [
+        pep_url for _, pep_url
+        in extract_record(session, PEPS_MAIN_URL, pep_index_rows)
+    ]
+    cards = fetch_records(
+        session,
+        pep_urls,
+        pep_card_row,
+        parse_procs=getattr(cli_args, 'parse_procs', PARSE_PROCS),
+        **fetch_options(cli_args)
+    )
+    for pep_url, (row, error) in tqdm(
+        zip(pep_urls, cards), total=len(pep_urls)
+    ):
+        if error:
+            logs += str(error)
+            continue
+        # В таблице заголовков карточки нет номера PEP.
+        yield PepMeta(
+            PEP_NUMBER.search(pep_url)[1], dict(zip(PEP_FIELDS[1:], row))
+        )
+    if logs:
+        logging.error(logs)
+
+
+def pep_meta(session, cli_args=None):
+    '''
+    Парсинг - полная таблица заголовков каждой карточки PEP.
+    '''
+    yield PEP_FIELDS
+    for record in pep_meta_records(session, cli_args):
+        yield tuple(record)
+
+
+def format_row(row):
+    '''
+    Строка результата в виде одной ячейки таблицы.
+    '''
+    return '' if row is None else ', '.join(map(str, row))
+
+
+def diff(session, cli_args=None):
+    '''
+    Изменения результатов режима --target между последним запуском
+    и предыдущим либо последним запуском не позднее --since.
+    '''
+    target = getattr(cli_args, 'target', None)
+    since = getattr(cli_args, 'since', None)
+    if target is None:
+        raise ParserHistoryException(HISTORY_ARGS_ERROR)
+    with closing(connect(BASE_DIR / RESULTS_DB)) as connection:
+        new_run, *old_runs = last_runs(connection, target) or [None]
+        if since:
+            old_runs = last_runs(connection, target, since, limit=1)
+        if new_run is None or not old_runs:
+            raise ParserHistoryException(NO_RUNS.format(mode=target))
+        yield ('Ключ', old_runs[0], new_run)
+        for row_key, old, new in diff_runs(
+            connection, target, old_runs[0], new_run
+        ):
+            yield (row_key, format_row(old), format_row(new))
+
+
+def history(session, cli_args=None):
+    '''
+    История изменений строки --key в результатах режима --target.
+    '''
+    target = getattr(cli_args, 'target', None)
+    row_key = getattr(cli_args, 'key', None)
+    if target is None or row_key is None:
+        raise ParserHistoryException(HISTORY_ARGS_ERROR)
+    with closing(connect(BASE_DIR / RESULTS_DB)) as connection:
+        runs = last_runs(connection, target, limit=1)
+        if not runs:
+            raise ParserHistoryException(NO_RUNS.format(mode=target))
+        yield ('Запуск', *run_header(connection, target, runs[0]))
+        for run_at, row in key_history(connection, target, row_key):
+            yield (run_at, *row)
+
+
+def pep_changes(old, new):
+    '''
+    Новые PEP и изменения статусов в общем списке PEP.
+    '''
+    old_statuses = {pep_url: status for status, pep_url in old}
+    for status, pep_url in new:
+        if pep_url not in old_statuses:
+            yield dict(event='pep-added', url=pep_url, status=status)
+        elif old_statuses[pep_url] != status:
+            yield dict(
+                event='pep-status', url=pep_url,
+                old=old_statuses[pep_url], new=status
+            )
+
+
+def version_changes(old, new):
+    '''
+    Новые версии Python и изменения их статусов.
+    '''
+    old_statuses = {version: status for _, version, status in old}
+    for link, version, status in new:
+        if version not in old_statuses:
+            yield dict(
+                event='version-added', url=link,
+                version=version, status=status
+            )
+        elif old_statuses[version] != status:
+            yield dict(
+                event='version-status', url=link, version=version,
+                old=old_statuses[version], new=status
+            )
+
+
+def whats_new_changes(old, new):
+    '''
+    Новые статьи о нововведениях.
+    '''
+    for link in new:
+        if link not in old:
+            yield dict(event='whats-new-article', url=link)
+
+
+WATCH_SOURCES = {
+    'pep': (lambda: PEPS_MAIN_URL, pep_index_rows, pep_changes),
+    'latest-versions': (lambda: MAIN_DOC_URL, version_rows, version_changes),
+    'whats-new': (
+        lambda: urljoin(MAIN_DOC_URL, 'whatsnew/'),
+        whats_new_links,
+        whats_new_changes
+    ),
+}
+
+
+def watch_intervals(values):
+    '''
+    Интервалы проверки источников из аргументов вида
+    ИСТОЧНИК=СЕКУНДЫ; для остальных источников - по умолчанию.
+    Источник с интервалом 0 не проверяется.
+    '''
+    intervals = dict(WATCH_INTERVALS)
+    for value in values or ():
+        source, _, seconds = value.partition('=')
+        if source not in WATCH_SOURCES or not seconds.isdigit():
+            raise ValueError(INTERVAL_ERROR.format(
+                sources=', '.join(WATCH_SOURCES), value=value
+            ))
+        intervals[source] = int(seconds)
+    if not any(intervals.values()):
+        raise ValueError(
+            NO_WATCH_SOURCES.format(sources=', '.join(WATCH_SOURCES))
+        )
+    return intervals
+
+
+def watch_events(session, cli_args=None):
+    '''
+    Проверка источников по расписанию условными запросами.
+    Разобранное состояние каждого источника хранится в памяти;
+    выдаются только изменения относительно прошлой проверки.
+    Если страницу не удалось загрузить или разобрать, ошибка
+    выводится в лог и сохраняется прежнее состояние источника.
+    '''
+    intervals = watch_intervals(getattr(cli_args, 'interval', None))
+    due = {
+        source: time.monotonic()
+        for source, interval in intervals.items() if interval
+    }
+    validators = {}
+    state = {}
+    while True:
+        source = min(due, key=due.get)
+        delay = due[source] - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        due[source] = time.monotonic() + intervals[source]
+        url, parse, changes = WATCH_SOURCES[source]
+        url = url()
+        try:
+            response = get_conditional_response(
+                session, url, **validators.get(url, {})
+            )
+            if response.status_code == 304:
+                continue
+            new = parse(response.text)
+        except (ConnectionError, ParserFindTagException) as error:
+            logging.error(error)
+            continue
+        except (TypeError, KeyError) as error:
+            logging.error(WATCH_PARSE_ERROR.format(url=url, error=error))
+            continue
+        validators[url] = dict(
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified')
+        )
+        if source in state:
+            yield from changes(state[source], new)
+        state[source] = new
+
+
+def watch(session, cli_args=None):
+    '''
+    Режим наблюдения: события изменений в формате JSON Lines.
+    '''
+    try:
+        for event in watch_events(session, cli_args):
+            event['at'] = dt.datetime.now().strftime(DATETIME_FORMAT)
+            print(json.dumps(event, ensure_ascii=False), flush=True)
+    except KeyboardInterrupt:
+        pass
+
+
+def serve(session, cli_args=None):
+    '''
+    Режим API: результаты latest_versions, whats_new и pep
+    в формате JSON из кеша в памяти, обновляемого в фоне.
+    '''
+    producers = {
+        'latest-versions': partial(latest_versions, session, cli_args),
+        'whats-new': partial(whats_new, session, cli_args),
+        'pep': partial(pep, session, cli_args),
+    }
+    host = getattr(cli_args, 'host', SERVE_HOST)
+    server = create_server(
+        producers,
+        host,
+        getattr(cli_args, 'port', SERVE_PORT),
+        getattr(cli_args, 'max_age', SERVE_MAX_AGE)
+    )
+    for name in producers:
+        server.cache.revalidate(name)
+    logging.info(SERVE_STATUS.format(host=host, port=server.server_port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -1,55 +1,328 @@
 import csv
 import datetime as dt
 import logging
-
-from prettytable import PrettyTable
+import os
+from itertools import chain, islice
 
 from constants import (
     BASE_DIR,
+    BATCH_SIZE,
     DATETIME_FORMAT,
+    OUTPUT_ARROW,
     OUTPUT_FILE,
+    OUTPUT_PARQUET,
     OUTPUT_PRETTY,
-    RESULTS
+    OUTPUT_SQLITE,
+    RESULTS,
+    RESULTS_DB,
+    TABLE_SAMPLE
 )
+from profiling import profiled
+from storage import connect, save_results
 
 STATUS = 'Файл с результатами был сохранён: {file_path}.'
+DB_STATUS = 'Результаты запуска {run_at} сохранены в базу: {db_path}.'
+
+
+def text_width(text):
+    '''Ширина текста на экране, как её считает PrettyTable.'''
+    if text.isascii() and text.isprintable():
+        return len(text)
+    from wcwidth import wcwidth
+
+    return sum(max(wcwidth(char), 0) for char in text)
+
+
+def truncate_line(line, max_width):
+    '''
+    Строка, обрезанная до max_width колонок экрана: ширина считается
+    по символам, широкие символы (например, CJK) занимают две колонки.
+    '''
+    if text_width(line) <= max_width:
+        return line
+    width = 0
+    for index, char in enumerate(line):
+        width += text_width(char)
+        if width > max_width - 1:
+            return line[:index] + '…'
+    return line
+
+
+def cell_lines(cell, max_width=None):
+    '''Строки ячейки таблицы шириной не более max_width колонок.'''
+    lines = str(cell).split('\n')
+    if max_width:
+        lines = [truncate_line(line, max_width) for line in lines]
+    return lines
+
+
+def table_border(widths):
+    return '+' + '+'.join('-' * (width + 2) for width in widths) + '+'
+
+
+def table_row(cells, widths):
+    '''Строки вывода одной строки таблицы с многострочными ячейками.'''
+    for index in range(max(map(len, cells), default=1)):
+        yield '|' + '|'.join(
+            ' {}{} '.format(line, ' ' * (width - text_width(line)))
+            for line, width in (
+                (lines[index] if index < len(lines) else '', width)
+                for lines, width in zip(cells, widths)
+            )
+        ) + '|'
+
+
+def row_widths(widths, row):
+    '''Ширина колонок с учётом ещё одной строки таблицы.'''
+    return [
+        max(width, *map(text_width, lines))
+        for width, lines in zip(widths, row)
+    ]
 
 
-def pretty_output(results, *args):
-    '''Печать данных в формате таблицы.'''
-    table = PrettyTable()
-    table.field_names = results[0]
-    table.align = 'l'
-    table.add_rows(results[1:])
-    print(table)
+def table_lines(results, sample_size=TABLE_SAMPLE, page_size=None,
+                max_width=None):
+    '''
+    Строки таблицы в том же виде, что у PrettyTable с выравниванием
+    по левому краю. Ширина колонок определяется по первым sample_size
+    строкам, остальные строки выводятся по мере получения. Если
+    ячейка шире колонки, колонка расширяется и заголовок выводится
+    заново; с page_size заголовок повторяется каждые page_size строк.
+    '''
+    rows = (
+        [cell_lines(cell, max_width) for cell in row] for row in results
+    )
+    header = next(rows, None)
+    if header is None:
+        return
+    sample = list(islice(rows, sample_size))
+    widths = [max(map(text_width, lines)) for lines in header]
+    for row in sample:
+        widths = row_widths(widths, row)
+
+    def page_header():
+        yield table_border(widths)
+        yield from table_row(header, widths)
+        yield table_border(widths)
+
+    yield from page_header()
+    page_rows = 0
+    for row in chain(sample, rows):
+        new_widths = row_widths(widths, row)
+        if new_widths != widths or page_rows == page_size:
+            widths = new_widths
+            yield from page_header()
+            page_rows = 0
+        yield from table_row(row, widths)
+        page_rows += 1
+    yield table_border(widths)
+
+
+def pretty_output(results, cli_args=None):
+    '''Печать данных в формате таблицы по мере их получения.'''
+    for line in table_lines(
+        results,
+        page_size=getattr(cli_args, 'page_size', None),
+        max_width=getattr(cli_args, 'max_width', None)
+    ):
+        print(line, flush=True)
 
 
 def default_output(results, *args):
-    '''Печать данных построчно.'''
+    '''Печать данных построчно по мере их получения.'''
     for row in results:
-        print(*row)
+        print(*row, flush=True)
 
 
-def file_output(results, cli_args):
-    '''Создание директории с результатами парсинга.'''
+def result_path(cli_args, extension):
+    '''Путь к файлу с результатами парсинга.'''
     results_dir = BASE_DIR / RESULTS
     results_dir.mkdir(exist_ok=True)
     parser_mode = cli_args.mode
     now = dt.datetime.now().strftime(DATETIME_FORMAT)
-    file_name = f'{parser_mode}_{now}.csv'
-    file_path = results_dir / file_name
+    return results_dir / f'{parser_mode}_{now}.{extension}'
+
+
+def file_output(results, cli_args):
+    '''
+    Создание директории с результатами парсинга.
+    Строки записываются в файл по мере их получения.
+    '''
+    file_path = result_path(cli_args, 'csv')
     with open(file_path, 'w', encoding='utf-8') as f:
-        csv.writer(f, csv.unix_dialect).writerows(results)
+        writer = csv.writer(f, csv.unix_dialect)
+        for row in results:
+            writer.writerow(row)
+            f.flush()
+    logging.info(STATUS.format(file_path=file_path))
+
+
+def output_schema(schema):
+    '''Схема для записи: колонки без значений считаются строковыми.'''
+    import pyarrow as pa
+
+    return pa.schema([
+        field.with_type(pa.string()) if pa.types.is_null(field.type)
+        else field
+        for field in schema
+    ])
+
+
+def cast_batch(batch, schema):
+    '''Пакет колонок, приведённый к схеме schema.'''
+    import pyarrow as pa
+
+    return pa.RecordBatch.from_arrays(
+        [
+            column.cast(field.type)
+            for column, field in zip(batch.columns, schema)
+        ],
+        schema=schema
+    )
+
+
+def record_batches(results, batch_size=BATCH_SIZE):
+    '''
+    Разбиение строк результата на пакеты колонок Arrow.
+    Каждый пакет приводится к схеме, объединённой по нему и всем
+    предыдущим пакетам: целые числа расширяются до дробных,
+    колонки без значений считаются строковыми. Для результата
+    без строк выдаётся пустой пакет со строковыми колонками.
+    '''
+    import pyarrow as pa
+
+    rows = iter(results)
+    names = [str(name) for name in next(rows)]
+    schema = pa.schema([pa.field(name, pa.null()) for name in names])
+    empty = True
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        empty = False
+        batch = pa.RecordBatch.from_arrays(
+            [pa.array(column) for column in zip(*batch)], names=names
+        )
+        schema = pa.unify_schemas(
+            [schema, batch.schema], promote_options='permissive'
+        )
+        yield cast_batch(batch, output_schema(schema))
+    if empty:
+        yield pa.RecordBatch.from_pylist([], schema=output_schema(schema))
+
+
+def parquet_writer(file_path, schema):
+    '''Запись пакетов в сжатый файл Parquet.'''
+    import pyarrow.parquet as pq
+
+    return pq.ParquetWriter(file_path, schema, compression='zstd')
+
+
+def arrow_writer(file_path, schema):
+    '''Запись пакетов в сжатый файл Arrow IPC.'''
+    import pyarrow as pa
+
+    return pa.ipc.new_file(
+        file_path, schema, options=pa.ipc.IpcWriteOptions(compression='zstd')
+    )
+
+
+def parquet_batches(file_path):
+    '''Пакеты, сохранённые в файле Parquet.'''
+    import pyarrow.parquet as pq
+
+    with open(file_path, 'rb') as source:
+        yield from pq.ParquetFile(source).iter_batches()
+
+
+def arrow_batches(file_path):
+    '''Пакеты, сохранённые в файле Arrow IPC.'''
+    import pyarrow as pa
+
+    with pa.memory_map(str(file_path)) as source:
+        reader = pa.ipc.open_file(source)
+        for index in range(reader.num_record_batches):
+            yield reader.get_batch(index)
+
+
+COLUMNAR_WRITERS = {
+    OUTPUT_PARQUET: parquet_writer,
+    OUTPUT_ARROW: arrow_writer,
+}
+COLUMNAR_READERS = {
+    OUTPUT_PARQUET: parquet_batches,
+    OUTPUT_ARROW: arrow_batches,
+}
+
+
+def rewrite_columnar(file_path, output, schema):
+    '''
+    Перезапись сохранённых пакетов с расширенной схемой schema.
+    Возвращает открытый файл для записи следующих пакетов.
+    '''
+    old_path = file_path.with_name(file_path.name + '.old')
+    os.replace(file_path, old_path)
+    writer = COLUMNAR_WRITERS[output](file_path, schema)
+    for batch in COLUMNAR_READERS[output](old_path):
+        writer.write_batch(cast_batch(batch, schema))
+    old_path.unlink()
+    return writer
+
+
+def columnar_output(results, cli_args):
+    '''
+    Сохранение данных в колоночном формате Parquet или Arrow.
+    Строки записываются пакетами по мере их получения. Если тип
+    колонки расширяется в очередном пакете, записанные пакеты
+    переписываются с новой схемой.
+    '''
+    file_path = result_path(cli_args, cli_args.output)
+    writer = schema = None
+    try:
+        for batch in record_batches(results, BATCH_SIZE):
+            if writer is None:
+                writer = COLUMNAR_WRITERS[cli_args.output](
+                    file_path, batch.schema
+                )
+            elif not batch.schema.equals(schema):
+                writer.close()
+                writer = rewrite_columnar(
+                    file_path, cli_args.output, batch.schema
+                )
+            schema = batch.schema
+            writer.write_batch(batch)
+    finally:
+        if writer is not None:
+            writer.close()
     logging.info(STATUS.format(file_path=file_path))
 
 
+def sqlite_output(results, cli_args):
+    '''
+    Сохранение данных в базу SQLite с историей запусков.
+    Все строки запуска записываются в одной транзакции.
+    '''
+    db_path = BASE_DIR / RESULTS_DB
+    run_at = dt.datetime.now().strftime(DATETIME_FORMAT)
+    connection = connect(db_path)
+    try:
+        save_results(connection, cli_args.mode, run_at, results)
+    finally:
+        connection.close()
+    logging.info(DB_STATUS.format(run_at=run_at, db_path=db_path))
+
+
 OUTPUT_MODE = {
     OUTPUT_PRETTY: pretty_output,
     OUTPUT_FILE: file_output,
+    OUTPUT_PARQUET: columnar_output,
+    OUTPUT_ARROW: columnar_output,
+    OUTPUT_SQLITE: sqlite_output,
     None: default_output,
 }
 
 
+@profiled('output')
 def control_output(results, cli_args):
     '''Определение формат вывода данных.'''
     OUTPUT_MODE[cli_args.output](results, cli_args)
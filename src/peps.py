@@ -0,0 +1,40 @@
+import sys
+
+PEP_FIELDS = (
+    'PEP', 'Title', 'Author', 'Sponsor', 'PEP-Delegate', 'Discussions-To',
+    'Status', 'Type', 'Topic', 'Requires', 'Created', 'Python-Version',
+    'Post-History', 'Replaces', 'Superseded-By', 'Resolution'
+)
+# Поля с небольшим набором повторяющихся значений.
+CATEGORICAL = ('Status', 'Type', 'Topic', 'Python-Version')
+
+
+def field_name(field):
+    '''Имя атрибута записи для поля таблицы заголовков PEP.'''
+    return field.lower().replace('-', '_')
+
+
+class PepMeta:
+    '''
+    Метаданные PEP из таблицы заголовков карточки. Запись хранит
+    поля в слотах без словаря атрибутов; значения категориальных
+    полей интернируются и хранятся в одном экземпляре на весь корпус.
+    Номер PEP - целое число, остальные поля - строки (пустая строка,
+    если поля нет в карточке).
+    '''
+
+    __slots__ = tuple(map(field_name, PEP_FIELDS))
+
+    def __init__(self, number, header):
+        self.pep = int(number)
+        for field, slot in zip(PEP_FIELDS[1:], self.__slots__[1:]):
+            value = header.get(field, '')
+            if field in CATEGORICAL:
+                value = sys.intern(value)
+            setattr(self, slot, value)
+
+    def __iter__(self):
+        return (getattr(self, slot) for slot in self.__slots__)
+
+    def __repr__(self):
+        return f'PepMeta(pep={self.pep!r}, status={self.status!r})'
@@ -0,0 +1,133 @@
+import cProfile
+import datetime as dt
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from functools import wraps
+
+from constants import BASE_DIR, DATETIME_FORMAT, PROFILES
+
+PERCENTILES = (50, 90, 99)
+PROFILE_STATUS = 'Отчёт профилирования сохранён: {file_path}.'
+
+
+def percentile(durations, percent):
+    '''Перцентиль отсортированного списка длительностей.'''
+    index = min(len(durations) - 1, len(durations) * percent // 100)
+    return durations[index]
+
+
+class Profiler:
+    '''
+    Сбор времени, количества вызовов и объёма данных по фазам.
+    Для каждой фазы учитывается полное время вызовов и собственное
+    время без вложенных профилируемых вызовов того же потока.
+    '''
+
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.reset()
+
+    def reset(self):
+        self.durations = defaultdict(list)
+        self.self_time = defaultdict(float)
+        self.sizes = defaultdict(int)
+
+    def enter(self):
+        stack = self.local.__dict__.setdefault('stack', [])
+        stack.append(0.0)
+
+    def leave(self, phase, elapsed, size=0):
+        stack = self.local.stack
+        nested = stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        with self.lock:
+            self.durations[phase].append(elapsed)
+            self.self_time[phase] += elapsed - nested
+            self.sizes[phase] += size
+
+    def report(self):
+        phases = {}
+        for phase, durations in self.durations.items():
+            durations = sorted(durations)
+            phases[phase] = dict(
+                count=len(durations),
+                total=sum(durations),
+                self=self.self_time[phase],
+                bytes=self.sizes[phase],
+                max=durations[-1],
+                **{
+                    f'p{percent}': percentile(durations, percent)
+                    for percent in PERCENTILES
+                }
+            )
+        return phases
+
+
+profiler = Profiler()
+
+
+def profiled(phase, size=None):
+    '''
+    Декоратор: замер вызова функции как фазы phase.
+    phase может быть функцией результата, size - функцией
+    результата и аргументов, возвращающей объём данных в байтах.
+    Без включённого профилирования функция вызывается как есть.
+    '''
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            profiler.enter()
+            start = time.perf_counter()
+            result = None
+            try:
+                result = func(*args, **kwargs)
+                return result
+            finally:
+                elapsed = time.perf_counter() - start
+                profiler.leave(
+                    phase(result) if callable(phase) else phase,
+                    elapsed,
+                    size(result, *args) if size and result is not None else 0
+                )
+        return wrapper
+    return decorator
+
+
+def run_profiled(func, cli_args, *args):
+    '''
+    Выполнение func с профилированием по фазам и сохранение
+    JSON-отчёта; с --cprofile рядом сохраняется дамп cProfile.
+    '''
+    profiles_dir = BASE_DIR / PROFILES
+    profiles_dir.mkdir(exist_ok=True)
+    now = dt.datetime.now().strftime(DATETIME_FORMAT)
+    file_path = profiles_dir / f'{cli_args.mode}_{now}.json'
+    profile = cProfile.Profile() if cli_args.cprofile else None
+    profiler.reset()
+    profiler.enabled = True
+    start = time.perf_counter()
+    try:
+        if profile:
+            profile.runcall(func, *args)
+        else:
+            func(*args)
+    finally:
+        wall = time.perf_counter() - start
+        profiler.enabled = False
+        if profile:
+            profile.dump_stats(file_path.with_suffix('.prof'))
+        with open(file_path, 'w', encoding='utf-8') as file:
+            json.dump(
+                dict(mode=cli_args.mode, wall=wall, phases=profiler.report()),
+                file,
+                indent=2
+            )
+        logging.info(PROFILE_STATUS.format(file_path=file_path))
@@ -0,0 +1,124 @@
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from constants import (LATENCY_TOLERANCE, MAX_RATE, MIN_RATE, RATE,
+                       THROTTLE_STATUSES)
+
+
+def retry_after_seconds(value):
+    '''Задержка из заголовка Retry-After: секунды или HTTP-дата.'''
+    if not value:
+        return 0
+    if value.strip().isdigit():
+        return int(value)
+    try:
+        return max(0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return 0
+
+
+class HostLimiter:
+    '''
+    Ограничение запросов к одному хосту: корзина токенов задаёт
+    частоту запросов, а число одновременных запросов подбирается
+    по схеме AIMD - растёт на единицу за «окно» успешных ответов
+    и уменьшается вдвое при 429/503 или заметном росте задержки.
+    '''
+
+    def __init__(self, max_concurrency, rate=RATE):
+        self.condition = threading.Condition()
+        self.max_concurrency = max_concurrency
+        self.concurrency = 1.0
+        self.in_flight = 0
+        self.rate = rate
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.min_latency = None
+
+    def refill(self, now):
+        self.tokens = min(
+            max(self.rate, 1.0),
+            self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+
+    def wait_time(self, now):
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.in_flight >= int(self.concurrency):
+            return None
+        if self.tokens < 1:
+            return (1 - self.tokens) / self.rate
+        return 0
+
+    def acquire(self):
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                self.refill(now)
+                delay = self.wait_time(now)
+                if delay == 0:
+                    break
+                self.condition.wait(delay)
+            self.tokens -= 1
+            self.in_flight += 1
+
+    def slow_down(self, retry_after):
+        self.concurrency = max(1.0, self.concurrency / 2)
+        self.rate = max(MIN_RATE, self.rate / 2)
+        self.blocked_until = max(
+            self.blocked_until, time.monotonic() + retry_after
+        )
+
+    def throttle(self, retry_after=0):
+        '''Сервер просит снизить нагрузку: уменьшаем частоту вдвое.'''
+        with self.condition:
+            self.slow_down(retry_after)
+
+    def release(self, latency, status=None, retry_after=0, failed=False):
+        '''
+        Запрос завершён. Ошибка соединения или таймаут считаются
+        перегрузкой хоста, и их задержка не учитывается в min_latency.
+        '''
+        with self.condition:
+            self.in_flight -= 1
+            if failed or status in THROTTLE_STATUSES:
+                self.slow_down(retry_after)
+            else:
+                if self.min_latency is None or latency < self.min_latency:
+                    self.min_latency = latency
+                if latency > self.min_latency * LATENCY_TOLERANCE:
+                    self.concurrency = max(1.0, self.concurrency * 0.9)
+                else:
+                    self.concurrency = min(
+                        self.max_concurrency,
+                        self.concurrency + 1 / self.concurrency
+                    )
+                    self.rate = min(MAX_RATE, self.rate + 1)
+            self.condition.notify_all()
+
+
+class RateLimiter:
+    '''Ограничители запросов по хостам.'''
+
+    def __init__(self, max_concurrency):
+        self.max_concurrency = max_concurrency
+        self.lock = threading.Lock()
+        self.hosts = {}
+
+    def __getitem__(self, host):
+        with self.lock:
+            if host not in self.hosts:
+                self.hosts[host] = HostLimiter(self.max_concurrency)
+            return self.hosts[host]
+
+    def stats(self):
+        return {
+            host: dict(
+                rate=round(limiter.rate, 2),
+                concurrency=round(limiter.concurrency, 2)
+            )
+            for host, limiter in self.hosts.items()
+        }
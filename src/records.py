@@ -0,0 +1,173 @@
+import hashlib
+import inspect
+import re
+import threading
+from functools import lru_cache
+from types import CodeType, FunctionType
+
+from utils import read_json, write_json
+
+
+def const_repr(value):
+    '''
+    Представление глобальной константы для хеша кода;
+    None для объектов, которые не являются данными.
+    '''
+    if value is None or isinstance(value, (str, bytes, int, float)):
+        return repr(value)
+    if isinstance(value, re.Pattern):
+        return repr((value.pattern, value.flags))
+    if isinstance(value, dict):
+        value = list(value.items())
+    elif isinstance(value, (set, frozenset)):
+        value = sorted(value, key=repr)
+    if not isinstance(value, (tuple, list)):
+        return None
+    items = [const_repr(item) for item in value]
+    return None if None in items else repr(items)
+
+
+def global_parts(code, namespace, seen):
+    '''Глобальные функции и константы, к которым обращается код.'''
+    for name in code.co_names:
+        if name not in namespace:
+            continue
+        value = namespace[name]
+        if isinstance(value, FunctionType):
+            value = inspect.unwrap(value)
+            if value.__code__ in seen:
+                continue
+            text = code_digest(value.__code__, value.__globals__, seen)
+        else:
+            text = const_repr(value)
+        if text is not None:
+            yield '{}={}'.format(name, text).encode()
+
+
+def code_digest(code, namespace=None, seen=None):
+    '''
+    Хеш байт-кода функции вместе с вложенными функциями,
+    а также глобальными функциями и константами, к которым
+    она обращается (вызываемые функции хешируются так же).
+    '''
+    namespace = {} if namespace is None else namespace
+    seen = set() if seen is None else seen
+    seen.add(code)
+    parts = [code.co_code, ' '.join(code.co_names).encode()]
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            const = code_digest(const, namespace, seen)
+        elif isinstance(const, frozenset):
+            const = sorted(map(repr, const))
+        parts.append(repr(const).encode())
+    parts.extend(global_parts(code, namespace, seen))
+    return hashlib.blake2b(b'\0'.join(parts), digest_size=8).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def parse_name(parse):
+    '''
+    Имя функции извлечения с версией её кода: после изменения
+    функции или вызываемых ею функций сохранённые ею записи
+    больше не используются.
+    '''
+    return '{}:{}'.format(
+        parse.__qualname__, code_digest(parse.__code__, parse.__globals__)
+    )
+
+
+def record_key(parse, url):
+    '''Ключ записи: функция извлечения с версией и адрес страницы.'''
+    return '{} {}'.format(parse_name(parse), url)
+
+
+def key_parse(key):
+    '''Имя функции извлечения (без версии) из ключа записи.'''
+    return key.split(' ', 1)[0].split(':', 1)[0]
+
+
+def text_digest(text):
+    '''Хеш содержимого страницы.'''
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+class RecordCache:
+    '''
+    Кеш данных, извлечённых из страниц, по адресу страницы и хешу
+    её содержимого. Если страница не изменилась, запись берётся
+    из кеша без разбора HTML; при изменении страницы запись
+    извлекается заново. При сохранении у функций извлечения,
+    работавших в этом запуске, удаляются записи, к которым
+    не обращались (страницы, пропавшие из списков, и записи
+    прежних версий функций); записи страниц, которые не удалось
+    загрузить, сохраняются.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.records = read_json(path)
+        self.changed = False
+        self.hits = self.misses = 0
+        self.touched = set()
+
+    def lookup(self, parse, url, text):
+        '''Сохранённая запись или None, если страница изменилась.'''
+        key = record_key(parse, url)
+        entry = self.records.get(key)
+        found = entry is not None and entry[0] == text_digest(text)
+        with self.lock:
+            self.touched.add(key)
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return entry[1] if found else None
+
+    def store(self, parse, url, text, record):
+        key = record_key(parse, url)
+        with self.lock:
+            self.records[key] = [text_digest(text), record]
+            self.touched.add(key)
+            self.changed = True
+
+    def touch(self, parse, url):
+        '''Запись страницы, которую не удалось загрузить, не удаляется.'''
+        with self.lock:
+            self.touched.add(record_key(parse, url))
+
+    def extract(self, parse, url, text):
+        '''Данные страницы: из кеша или извлечённые функцией parse.'''
+        record = self.lookup(parse, url, text)
+        if record is None:
+            record = parse(text)
+            self.store(parse, url, text, record)
+        return record
+
+    def clear(self):
+        with self.lock:
+            self.records = {}
+            self.changed = True
+
+    def prune(self):
+        '''
+        Удаление записей функций извлечения, работавших в этом
+        запуске, к которым в запуске не обращались.
+        '''
+        used = set(map(key_parse, self.touched))
+        with self.lock:
+            stale = [
+                key for key in self.records
+                if key not in self.touched
+                and key_parse(key) in used
+            ]
+            for key in stale:
+                del self.records[key]
+            self.changed = self.changed or bool(stale)
+        return len(stale)
+
+    def save(self):
+        self.prune()
+        if self.changed:
+            write_json(self.path, self.records)
+            self.changed = False
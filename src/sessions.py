@@ -0,0 +1,213 @@
+import random
+import time
+from collections import Counter
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from requests.adapters import HTTPAdapter
+from requests_cache import CachedSession
+from urllib3.util.retry import Retry
+
+from constants import (BACKOFF_FACTOR, BACKOFF_JITTER, CACHE_ACCESS_LOG,
+                       CACHE_EXPIRE_AFTER, CACHE_NAME, CACHE_SQLITE,
+                       POOL_SIZE, REQUEST_TIMEOUT, RETRIES, RETRY_STATUSES,
+                       THROTTLE_STATUSES, WORKERS)
+from ratelimit import RateLimiter, retry_after_seconds
+from utils import read_json, write_json
+
+EXPIRE_ERROR = 'Ожидается ШАБЛОН=СЕКУНДЫ, получено: {value}'
+
+
+def parse_expire_after(values):
+    '''
+    Сроки хранения из аргументов вида ШАБЛОН=СЕКУНДЫ.
+    Они проверяются раньше сроков по умолчанию.
+    '''
+    expire_after = {}
+    for value in values or ():
+        pattern, _, seconds = value.rpartition('=')
+        if not pattern or not seconds.lstrip('-').isdigit():
+            raise ValueError(EXPIRE_ERROR.format(value=value))
+        expire_after[pattern] = int(seconds)
+    for pattern, default in CACHE_EXPIRE_AFTER.items():
+        expire_after.setdefault(pattern, default)
+    return expire_after
+
+
+class BackoffRetry(Retry):
+    '''
+    Повторы с экспоненциальной задержкой и случайной добавкой.
+    Количество повторов по причинам накапливается в stats,
+    ответы 429/503 замедляют ограничитель запросов limiter.
+    '''
+
+    def __init__(self, *args, stats=None, limiter=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = Counter() if stats is None else stats
+        self.limiter = limiter
+
+    def new(self, **kwargs):
+        return super().new(stats=self.stats, limiter=self.limiter, **kwargs)
+
+    def get_backoff_time(self):
+        backoff = super().get_backoff_time()
+        return backoff + random.uniform(0, BACKOFF_JITTER) if backoff else 0
+
+    def increment(self, method=None, url=None, response=None, error=None,
+                  _pool=None, *args, **kwargs):
+        reason = response.status if response is not None else (
+            type(error).__name__
+        )
+        self.stats[str(reason)] += 1
+        if self.limiter is not None and _pool is not None and (
+            reason in THROTTLE_STATUSES
+        ):
+            self.limiter[_pool.host].throttle(
+                retry_after_seconds(response.headers.get('Retry-After'))
+            )
+        return super().increment(
+            method, url, response, error, _pool, *args, **kwargs
+        )
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    '''
+    Адаптер с таймаутом запросов по умолчанию. Если задан limiter,
+    запросы в сеть проходят через ограничитель своего хоста;
+    ответы из кеша до адаптера не доходят и не ограничиваются.
+    '''
+
+    def __init__(self, *args, timeout=REQUEST_TIMEOUT, limiter=None,
+                 **kwargs):
+        self.timeout = timeout
+        self.limiter = limiter
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        if self.limiter is None:
+            return super().send(request, **kwargs)
+        host = self.limiter[urlsplit(request.url).hostname]
+        host.acquire()
+        start = time.monotonic()
+        status = retry_after = None
+        failed = True
+        try:
+            response = super().send(request, **kwargs)
+            status = response.status_code
+            retry_after = retry_after_seconds(
+                response.headers.get('Retry-After')
+            )
+            failed = False
+            return response
+        finally:
+            host.release(
+                time.monotonic() - start, status, retry_after or 0, failed
+            )
+
+
+def mount_adapters(session, workers=WORKERS, rate_limit=False):
+    '''
+    Адаптеры с пулом соединений не меньше числа потоков загрузки
+    и повторами для ответов 429, 5xx и разорванных соединений.
+    С rate_limit частота и число одновременных запросов к каждому
+    хосту подстраиваются под задержку и ответы 429/503.
+    '''
+    limiter = RateLimiter(max(workers, 1)) if rate_limit else None
+    retry = BackoffRetry(
+        total=RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(('GET', 'HEAD')),
+        respect_retry_after_header=True,
+        limiter=limiter,
+    )
+    adapter = TimeoutHTTPAdapter(
+        pool_maxsize=max(workers, POOL_SIZE), max_retries=retry,
+        limiter=limiter
+    )
+    for prefix in ('http://', 'https://'):
+        session.mount(prefix, adapter)
+    session.retry_stats = retry.stats
+    session.rate_limiter = limiter
+    return session
+
+
+def session_stats(session):
+    '''Статистика повторов, пулов соединений и ограничителей сессии.'''
+    connections = requests = 0
+    limiter = getattr(session, 'rate_limiter', None)
+    for adapter in set(session.adapters.values()):
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools[key]
+            connections += pool.num_connections
+            requests += pool.num_requests
+    return dict(
+        retries=dict(getattr(session, 'retry_stats', {})),
+        connections=connections,
+        requests=requests,
+        limits=limiter.stats() if limiter else {}
+    )
+
+
+def create_session(cli_args=None):
+    '''
+    Сессия с кешем HTTP-ответов по настройкам командной строки:
+    бэкенд кеша и сроки хранения по шаблонам адресов. Сессия
+    запоминает время обращения к каждому ответу для вытеснения.
+    '''
+    backend = getattr(cli_args, 'cache_backend', CACHE_SQLITE)
+    options = dict(wal=True) if backend == CACHE_SQLITE else {}
+    session = CachedSession(
+        CACHE_NAME,
+        backend=backend,
+        urls_expire_after=parse_expire_after(
+            getattr(cli_args, 'cache_expire', None)
+        ),
+        **options
+    )
+    session.access_log = {}
+
+    def remember_access(response, *args, **kwargs):
+        cache_key = getattr(response, 'cache_key', None)
+        if cache_key:
+            session.access_log[cache_key] = time.time()
+        return response
+
+    session.hooks['response'].append(remember_access)
+    return mount_adapters(
+        session,
+        getattr(cli_args, 'workers', WORKERS),
+        getattr(cli_args, 'rate_limit', False)
+    )
+
+
+def trim_cache(session, max_size, access_log_path=Path(CACHE_ACCESS_LOG)):
+    '''
+    Удаление просроченных ответов и, если кеш больше max_size байт,
+    вытеснение ответов, к которым дольше всего не обращались.
+    Возвращает количество вытесненных ответов и размер кеша.
+    '''
+    session.cache.delete(expired=True)
+    access_log = {
+        **read_json(access_log_path), **getattr(session, 'access_log', {})
+    }
+    sizes = {
+        key: len(response.content)
+        for key, response in session.cache.responses.items()
+    }
+    size = sum(sizes.values())
+    evicted = []
+    for key in sorted(sizes, key=lambda key: access_log.get(key, 0)):
+        if size <= max_size:
+            break
+        size -= sizes.pop(key)
+        evicted.append(key)
+    if evicted:
+        session.cache.delete(*evicted)
+    write_json(access_log_path, {
+        key: access_log.get(key, 0) for key in sizes
+    })
+    return len(evicted), size
@@ -0,0 +1,139 @@
+import json
+import sqlite3
+from collections import defaultdict
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    mode TEXT NOT NULL,
+    run_at TEXT NOT NULL,
+    header TEXT NOT NULL,
+    PRIMARY KEY (mode, run_at)
+);
+CREATE TABLE IF NOT EXISTS rows (
+    mode TEXT NOT NULL,
+    row_key TEXT NOT NULL,
+    run_at TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (mode, row_key, run_at)
+);
+CREATE INDEX IF NOT EXISTS rows_by_run ON rows (mode, run_at);
+'''
+UPSERT_RUN = '''
+INSERT INTO runs (mode, run_at, header) VALUES (?, ?, ?)
+ON CONFLICT (mode, run_at) DO UPDATE SET header = excluded.header
+'''
+UPSERT_ROW = '''
+INSERT INTO rows (mode, row_key, run_at, data) VALUES (?, ?, ?, ?)
+ON CONFLICT (mode, row_key, run_at) DO UPDATE SET data = excluded.data
+'''
+SELECT_RUNS = '''
+SELECT run_at FROM runs
+WHERE mode = :mode AND substr(run_at, 1, length(:until)) <= :until
+ORDER BY run_at DESC LIMIT :limit
+'''
+SELECT_HEADER = 'SELECT header FROM runs WHERE mode = ? AND run_at = ?'
+SELECT_RUN_ROWS = '''
+SELECT row_key, data FROM rows WHERE mode = ? AND run_at = ?
+'''
+SELECT_KEY_HISTORY = '''
+SELECT run_at, data FROM rows WHERE mode = ? AND row_key = ?
+ORDER BY run_at
+'''
+LATEST_RUN = '9999'
+# Режимы, у которых первая колонка не уникальна: число колонок ключа.
+KEY_COLUMNS = {'whats-new-peps': 2}
+DUPLICATE_KEY = '{key} #{number}'
+
+
+def connect(path):
+    '''Подключение к базе результатов парсинга.'''
+    connection = sqlite3.connect(path)
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def row_keys(mode, rows):
+    '''
+    Ключи строк результата: значения первых колонок строки
+    (KEY_COLUMNS, по умолчанию одной). Повторяющийся ключ получает
+    номер, чтобы строки не перезаписывали друг друга.
+    '''
+    columns = KEY_COLUMNS.get(mode, 1)
+    seen = defaultdict(int)
+    for row in rows:
+        row_key = ' '.join(map(str, row[:columns]))
+        seen[row_key] += 1
+        if seen[row_key] > 1:
+            row_key = DUPLICATE_KEY.format(key=row_key, number=seen[row_key])
+        yield row_key, row
+
+
+def save_results(connection, mode, run_at, results):
+    '''
+    Сохранение строк результата одного запуска в одной транзакции.
+    '''
+    rows = iter(results)
+    with connection:
+        connection.execute(
+            UPSERT_RUN, (mode, run_at, json.dumps(next(rows)))
+        )
+        connection.executemany(
+            UPSERT_ROW,
+            (
+                (mode, row_key, run_at, json.dumps(row))
+                for row_key, row in row_keys(mode, rows)
+            )
+        )
+
+
+def last_runs(connection, mode, until=LATEST_RUN, limit=2):
+    '''
+    Время последних запусков режима, не позднее until. until может
+    быть началом даты: '2024-01-01' включает весь этот день.
+    '''
+    return [
+        run_at for run_at, in
+        connection.execute(
+            SELECT_RUNS, dict(mode=mode, until=until, limit=limit)
+        )
+    ]
+
+
+def run_header(connection, mode, run_at):
+    '''Заголовок результата запуска.'''
+    header, = connection.execute(SELECT_HEADER, (mode, run_at)).fetchone()
+    return tuple(json.loads(header))
+
+
+def run_rows(connection, mode, run_at):
+    '''Строки результата запуска по ключам.'''
+    return {
+        row_key: tuple(json.loads(data))
+        for row_key, data in
+        connection.execute(SELECT_RUN_ROWS, (mode, run_at))
+    }
+
+
+def diff_runs(connection, mode, old_run, new_run):
+    '''
+    Различия между двумя запусками: ключ, строка в старом
+    и строка в новом запуске; отсутствующая строка - None.
+    '''
+    old_rows = run_rows(connection, mode, old_run)
+    new_rows = run_rows(connection, mode, new_run)
+    for row_key in sorted(old_rows.keys() | new_rows.keys()):
+        old, new = old_rows.get(row_key), new_rows.get(row_key)
+        if old != new:
+            yield row_key, old, new
+
+
+def key_history(connection, mode, row_key):
+    '''Изменения строки с ключом row_key от запуска к запуску.'''
+    previous = None
+    for run_at, data in connection.execute(
+        SELECT_KEY_HISTORY, (mode, row_key)
+    ):
+        row = tuple(json.loads(data))
+        if row != previous:
+            yield run_at, row
+        previous = row
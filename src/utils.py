@@ -1,27 +1,219 @@
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
 from bs4 import BeautifulSoup
+from lxml import etree
 from requests import RequestException
 
+from constants import CHUNK_SIZE, PARSE_PROCS, WORKERS
 from exceptions import ParserFindTagException
+from profiling import profiled
 
 ERROR_TAG = 'Не найден тег {tag} {attrs}.'
 RESPONSE_ERROR = 'Данные со страницы {url} не получены: {error}.'
+NO_STORE = {'Cache-Control': 'no-store'}
+
+
+def response_phase(response):
+    '''Фаза профилирования: ответ из кеша или из сети.'''
+    return 'cache' if getattr(response, 'from_cache', False) else 'network'
 
 
-def get_response(session, url, encoding='utf-8'):
+@profiled(response_phase, size=lambda response, *args: len(response.content))
+def get_response(session, url, encoding='utf-8', **kwargs):
     '''Перехватываем ошибки RequestException.'''
     try:
-        response = session.get(url)
+        response = session.get(url, **kwargs)
         response.encoding = encoding
         return response
     except RequestException as error:
         raise ConnectionError(RESPONSE_ERROR.format(url=url, error=error))
 
 
+def get_conditional_response(session, url, etag=None, last_modified=None):
+    '''
+    Условный запрос в обход кеша: сервер ответит 304,
+    если страница не изменилась с прошлой загрузки.
+    '''
+    headers = dict(NO_STORE)
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    return get_response(session, url, headers=headers)
+
+
+@profiled('parse', size=lambda soup, text, *args: len(text))
+def soup_from_text(text, parsing='lxml'):
+    '''Преобразуем текст HTML-документа в дерево объектов Python.'''
+    return BeautifulSoup(text, parsing)
+
+
 def making_soup(session, url, parsing='lxml'):
     '''Преобразуем HTML-документ в дерево объектов Python.'''
-    return BeautifulSoup(get_response(session, url).text, parsing)
+    return soup_from_text(get_response(session, url).text, parsing)
+
+
+def extract_record(session, url, parse):
+    '''
+    Данные страницы url, извлечённые функцией parse. Если у сессии
+    есть кеш записей records, неизменившиеся страницы не разбираются.
+    '''
+    text = get_response(session, url).text
+    records = getattr(session, 'records', None)
+    if records is None:
+        return parse(text)
+    return records.extract(parse, url, text)
+
+
+def parsed_page(parse, item, records=None):
+    '''Результат разбора страницы из окна parse_in_processes.'''
+    page, future, error = item
+    if error:
+        return None, error
+    url, text, record = page
+    if future is not None:
+        record = future.result()
+        if records is not None:
+            records.store(parse, url, text, record)
+    return record, None
+
+
+def parse_in_processes(parse, pages, procs, records=None):
+    '''
+    Разбираем тексты страниц в пуле процессов.
+    Между процессами передаются только тексты и извлечённые данные.
+    Страницы, данные которых нашлись в кеше records, не разбираются.
+    Одновременно в разборе не больше 2 * procs страниц: следующие
+    страницы берутся из pages по мере выдачи результатов.
+    '''
+    window = deque()
+    with ProcessPoolExecutor(max_workers=procs) as executor:
+        for page, error in pages:
+            window.append((
+                page,
+                None if error or page[2] is not None
+                else executor.submit(parse, page[1]),
+                error
+            ))
+            if len(window) >= 2 * procs:
+                yield parsed_page(parse, window.popleft(), records)
+        while window:
+            yield parsed_page(parse, window.popleft(), records)
+
+
+def load_in_threads(load, items, workers):
+    '''
+    Применяем load к элементам items; при workers > 1 - в пуле
+    потоков. Порядок результатов совпадает с порядком items.
+    '''
+    if workers <= 1:
+        yield from map(load, items)
+        return
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(load, items)
+
+
+def fetch_records(session, urls, parse, workers=WORKERS,
+                  parse_procs=PARSE_PROCS):
+    '''
+    Загружаем страницы и извлекаем из них данные функцией parse.
+    Страницы загружаются не более чем в workers потоков.
+    При parse_procs > 1 разбор выполняется в пуле процессов.
+    Порядок результатов совпадает с порядком urls.
+    Для каждой страницы возвращается пара (данные, ошибка загрузки).
+    '''
+    records = getattr(session, 'records', None)
+
+    def failed(url, error):
+        if records is not None:
+            records.touch(parse, url)
+        return None, error
+
+    def load(url):
+        if parse_procs <= 1:
+            try:
+                return extract_record(session, url, parse), None
+            except ConnectionError as error:
+                return failed(url, error)
+        try:
+            text = get_response(session, url).text
+        except ConnectionError as error:
+            return failed(url, error)
+        record = records and records.lookup(parse, url, text)
+        return (url, text, record), None
+
+    pages = load_in_threads(load, urls, workers)
+    if parse_procs > 1:
+        pages = parse_in_processes(parse, pages, parse_procs, records)
+    yield from pages
+
+
+def iter_elements(session, url, encoding='utf-8', chunk_size=CHUNK_SIZE):
+    '''
+    Постепенно разбираем HTML-документ, выдавая элементы по мере
+    их закрытия. Страницы, которых нет в кеше, читаются потоком
+    в обход кеша; соединение закрывается, как только генератор
+    закрыт, даже если документ прочитан не полностью.
+    '''
+    options = {} if session.cache.contains(url=url) else dict(
+        headers=NO_STORE
+    )
+    try:
+        response = session.get(url, stream=True, **options)
+    except RequestException as error:
+        raise ConnectionError(RESPONSE_ERROR.format(url=url, error=error))
+    parser = etree.HTMLPullParser(events=('end',), encoding=encoding)
+    with response:
+        try:
+            for chunk in response.iter_content(chunk_size):
+                parser.feed(chunk)
+                for _, element in parser.read_events():
+                    yield element
+        except RequestException as error:
+            raise ConnectionError(RESPONSE_ERROR.format(url=url, error=error))
+
+
+def stream_records(session, urls, extract, workers=WORKERS):
+    '''
+    Извлекаем данные функцией extract из элементов страниц,
+    разбираемых по мере загрузки. Порядок результатов совпадает
+    с порядком urls. Для каждой страницы возвращается пара
+    (данные, ошибка загрузки).
+    '''
+    def load(url):
+        elements = iter_elements(session, url)
+        try:
+            return extract(elements), None
+        except ConnectionError as error:
+            return None, error
+        finally:
+            elements.close()
+
+    yield from load_in_threads(load, urls, workers)
+
+
+def read_json(path):
+    '''Чтение JSON-файла; пустой словарь, если файла нет.'''
+    try:
+        with open(path, encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_json(path, data):
+    '''Атомарная запись JSON-файла через временный файл.'''
+    path.parent.mkdir(exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump(data, file, ensure_ascii=False)
+    os.replace(tmp_path, path)
 
 
+@profiled('extract')
 def find_tag(soup, tag, attrs=None):
     '''Перехватываем ошибки поиска тегов.'''
     attrs_data = {} if attrs is None else attrs
@@ -1,5 +1,7 @@
 import sys
+import threading
 from argparse import Namespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from typing import List, Tuple
 
@@ -16,6 +18,27 @@ sys.path.append(str(SRC_DIR))
 
 MAIN_DOC_URL = 'https://docs.python.org/3/'
 PEP_URL = 'https://www.python.org/dev/peps/'
+PEPS_MAIN_URL = 'https://peps.python.org/'
+PEP_INDEX_ROW = (
+    '<tr><td><abbr title="{type}, {status}">{abbr}</abbr></td>'
+    '<td><a href="pep-{number:04d}/">{number}</a></td></tr>'
+)
+PEP_CARD = (
+    '<html><body><h1 class="page-title">PEP {number} – Title</h1>'
+    '<dl class="rfc2822 field-list simple">'
+    '<dt class="field-odd">Author<span class="colon">:</span></dt>'
+    '<dd class="field-odd">Guido van Rossum</dd>'
+    '<dt class="field-even">Status<span class="colon">:</span></dt>'
+    '<dd class="field-even"><abbr>{status}</abbr></dd>'
+    '</dl><section>{body}</section></body></html>'
+)
+PEP_STATUSES = {
+    1: ('Active', 'Active'),
+    8: ('Active', 'Active'),
+    3000: ('Final', 'Final'),
+    3001: ('Rejected', 'Rejected'),
+    3333: ('Draft', 'Final'),
+}
 
 
 precode_files = ['constants.py', 'main.py', 'utils.py']
@@ -92,6 +115,103 @@ def pep_namespace():
     return Namespace(mode='pep', clear_cache=False, output='file')
 
 
+@pytest.fixture
+def pep_pages():
+    '''
+    Главная страница PEP, api/peps.json и карточки PEP
+    без обращения к сети.
+    '''
+    rows = ''.join(
+        PEP_INDEX_ROW.format(
+            type='Standards Track', status=status, abbr='S' + status[0],
+            number=number
+        )
+        for number, (status, _) in PEP_STATUSES.items()
+    )
+    with requests_mock.Mocker() as mock:
+        mock.get(
+            PEPS_MAIN_URL,
+            text=(
+                '<section id="numerical-index"><table>'
+                f'<tr><th>PEP</th></tr>{rows}</table></section>'
+            )
+        )
+        mock.get(
+            f'{PEPS_MAIN_URL}api/peps.json',
+            text=(BASE_DIR / 'tests' / 'fixture_data' / 'peps.json')
+            .read_text(encoding='utf-8')
+        )
+        for number, (_, card_status) in PEP_STATUSES.items():
+            mock.get(
+                f'{PEPS_MAIN_URL}pep-{number:04d}/',
+                text=PEP_CARD.format(
+                    number=number, status=card_status, body='x' * 100
+                )
+            )
+        yield mock
+
+
+class FileHandler(BaseHTTPRequestHandler):
+    '''Отдаёт файл сервера с поддержкой HEAD, ETag и Range.'''
+
+    def log_message(self, *args):
+        pass
+
+    def send_file(self, with_body):
+        server = self.server
+        server.requests.append((self.command, dict(self.headers)))
+        payload = server.payload
+        start, end = 0, len(payload) - 1
+        range_header = self.headers.get('Range')
+        if_range = self.headers.get('If-Range')
+        if (
+            server.ranges and range_header
+            and if_range in (None, server.etag)
+        ):
+            start, _, last = range_header.split('=')[1].partition('-')
+            start, end = int(start), int(last) if last else end
+            self.send_response(206)
+            self.send_header(
+                'Content-Range', f'bytes {start}-{end}/{len(payload)}'
+            )
+        else:
+            self.send_response(200)
+        body = payload[start:end + 1]
+        if server.ranges:
+            self.send_header('Accept-Ranges', 'bytes')
+        if server.etag is not None:
+            self.send_header('ETag', server.etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if with_body:
+            self.wfile.write(body[:server.cut_at])
+
+    def do_HEAD(self):
+        self.send_file(with_body=False)
+
+    def do_GET(self):
+        self.send_file(with_body=True)
+
+
+@pytest.fixture
+def file_server():
+    '''Локальный HTTP-сервер, отдающий один файл.'''
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FileHandler)
+    server.payload = bytes(range(256)) * 4096
+    server.etag = '"v1"'
+    server.ranges = True
+    server.cut_at = None
+    server.requests = []
+    server.url = 'http://127.0.0.1:{}/docs-pdf-a4.zip'.format(
+        server.server_address[1]
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
 def converting(what_convert: List[Tuple[List[int]]]) -> List[Tuple]:
     converted = []
     for lis in what_convert:
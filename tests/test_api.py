@@ -0,0 +1,81 @@
+import threading
+import time
+
+import pytest
+import requests
+
+try:
+    from src import api
+except ModuleNotFoundError:
+    assert False, 'Убедитесь что в директории `src` есть файл `api.py`'
+except ImportError:
+    assert False, 'Убедитесь что в директории `src` есть файл `api.py`'
+
+
+class Producer:
+    '''Результат режима, который можно подменить и задержать.'''
+
+    def __init__(self):
+        self.rows = [('Статус', 'Количество'), ('Active', 1)]
+        self.calls = 0
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self):
+        self.calls += 1
+        self.release.wait(5)
+        return iter(self.rows)
+
+
+@pytest.fixture
+def api_server():
+    producer = Producer()
+    server = api.create_server(dict(pep=producer), '127.0.0.1', 0, 60)
+    server.producer = producer
+    server.url = 'http://127.0.0.1:{}/'.format(server.server_port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_api_etag(api_server):
+    response = requests.get(api_server.url + 'pep')
+    assert response.json() == dict(
+        mode='pep', header=['Статус', 'Количество'], rows=[['Active', 1]]
+    ), 'API должен отдавать результат режима в формате JSON'
+    etag = response.headers['ETag']
+    response = requests.get(
+        api_server.url + 'pep', headers={'If-None-Match': etag}
+    )
+    assert response.status_code == 304, (
+        'При совпадении ETag API должен отвечать 304'
+    )
+    assert requests.get(api_server.url + 'unknown').status_code == 404
+    assert api_server.producer.calls == 1, (
+        'Свежий результат должен браться из памяти'
+    )
+
+
+def test_api_stale_while_revalidate(api_server):
+    cache, producer = api_server.cache, api_server.producer
+    etag = requests.get(api_server.url + 'pep').headers['ETag']
+    cache.max_age = 0
+    producer.rows = [('Статус', 'Количество'), ('Active', 2)]
+    producer.release.clear()
+    response = requests.get(api_server.url + 'pep')
+    assert response.headers['ETag'] == etag, (
+        'Устаревший результат должен отдаваться сразу, '
+        'не дожидаясь обновления'
+    )
+    producer.release.set()
+    for _ in range(100):
+        if 'pep' not in cache.refreshing:
+            break
+        time.sleep(0.01)
+    response = requests.get(
+        api_server.url + 'pep', headers={'If-None-Match': etag}
+    )
+    assert response.json()['rows'] == [['Active', 2]], (
+        'После фонового обновления API должен отдавать новые данные'
+    )
@@ -0,0 +1,95 @@
+import os
+import zipfile
+
+import pytest
+
+try:
+    from src import archives
+except ModuleNotFoundError:
+    assert False, 'Убедитесь что в директории `src` есть файл `archives.py`'
+except ImportError:
+    assert False, 'Убедитесь что в директории `src` есть файл `archives.py`'
+
+MEMBERS = {
+    'docs/index.txt': b'Python ' * 1000,
+    'docs/whatsnew.txt': 'Что нового'.encode('utf-8'),
+    'docs/empty.txt': b'',
+}
+
+
+@pytest.fixture
+def archive_path(tmp_path):
+    path = tmp_path / 'docs-text.zip'
+    with zipfile.ZipFile(path, 'w') as archive:
+        for name, content in MEMBERS.items():
+            archive.writestr(
+                name, content,
+                zipfile.ZIP_STORED if name.endswith('whatsnew.txt')
+                else zipfile.ZIP_DEFLATED
+            )
+        archive.comment = b'Python docs'
+    return path
+
+
+def test_build_manifest(archive_path):
+    manifest = archives.build_manifest(archive_path)
+    with zipfile.ZipFile(archive_path) as archive:
+        expected = {
+            info.filename: [info.compress_size, info.file_size, info.CRC]
+            for info in archive.infolist()
+        }
+    assert {
+        name: member[1:4] for name, member in manifest['members'].items()
+    } == expected, (
+        'Манифест должен содержать размеры и CRC всех файлов архива'
+    )
+
+
+def test_read_member(archive_path):
+    for name, content in MEMBERS.items():
+        assert archives.read_member(archive_path, name) == content, (
+            'Файл из архива должен читаться без распаковки остальных'
+        )
+    with pytest.raises(KeyError):
+        archives.read_member(archive_path, 'missing.txt')
+    assert archives.verify_archive(archive_path) == len(MEMBERS)
+
+
+def test_archive_manifest_reuse(archive_path, monkeypatch):
+    manifest = archives.archive_manifest(archive_path)
+    assert archives.index_path(archive_path).exists()
+
+    def build_manifest(path):
+        raise AssertionError('Манифест неизменившегося архива не строится')
+
+    monkeypatch.setattr(archives, 'build_manifest', build_manifest)
+    assert archives.archive_manifest(archive_path) == manifest
+    monkeypatch.undo()
+    stat = archive_path.stat()
+    os.utime(archive_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert archives.archive_manifest(archive_path) == dict(
+        manifest, mtime_ns=stat.st_mtime_ns + 1
+    ), 'Манифест изменившегося архива должен строиться заново'
+
+
+def test_corrupted_archive(archive_path, tmp_path):
+    manifest = archives.build_manifest(archive_path)
+    start = manifest['members']['docs/index.txt'][0]
+    data = bytearray(archive_path.read_bytes())
+    data[start] ^= 0xFF
+    archive_path.write_bytes(data)
+    with pytest.raises(archives.ParserArchiveException):
+        archives.verify_archive(archive_path, manifest)
+    broken = tmp_path / 'broken.zip'
+    broken.write_bytes(data[:start])
+    with pytest.raises(archives.ParserArchiveException):
+        archives.build_manifest(broken)
+
+
+def test_empty_archive(tmp_path):
+    empty = tmp_path / 'empty.zip'
+    empty.write_bytes(b'')
+    with pytest.raises(archives.ParserArchiveException):
+        archives.build_manifest(empty)
+    with pytest.raises(archives.ParserArchiveException):
+        archives.verify_archive(empty)
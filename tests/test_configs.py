@@ -31,7 +31,7 @@ def test_configs_file():
     ),
     (
         argparse._StoreAction, ['-o', '--output'], 'output',
-        ('pretty', 'file'),
+        ('pretty', 'file', 'parquet', 'arrow', 'sqlite'),
         'Дополнительные способы вывода данных'
     ),
 ])
@@ -66,3 +66,13 @@ def test_configure_argument_parser(
     assert got_action.help == help_str, (
         f'Укажите help-строку cli аргумента {got_action.dest}'
     )
+
+
+def test_several_modes():
+    parser = configs.configure_argument_parser(['whats-new', 'pep', 'all'])
+    got = parser.parse_args(['whats-new', 'pep'])
+    assert got.mode == ['whats-new', 'pep'], (
+        'Парсер должен принимать несколько режимов за один запуск'
+    )
+    with pytest.raises(SystemExit):
+        parser.parse_args(['pep', '--target', 'all'])
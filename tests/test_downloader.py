@@ -0,0 +1,175 @@
+import pytest
+
+try:
+    from src import downloader
+except ModuleNotFoundError:
+    assert False, 'Убедитесь что в директории `src` есть файл `downloader.py`'
+except ImportError:
+    assert False, 'Убедитесь что в директории `src` есть файл `downloader.py`'
+
+
+def get_requests(server):
+    return [
+        (command, headers.get('Range'))
+        for command, headers in server.requests if command == 'GET'
+    ]
+
+
+def test_download_file(file_server, tempfile_session, tmp_path):
+    path = tmp_path / 'docs-pdf-a4.zip'
+    got = downloader.download_file(
+        tempfile_session, file_server.url, path, chunk_size=1024
+    )
+    assert got is True
+    assert path.read_bytes() == file_server.payload, (
+        'Функция `download_file` должна сохранять файл целиком'
+    )
+    assert not path.with_name(path.name + '.part').exists(), (
+        'После загрузки не должно оставаться временного файла'
+    )
+
+
+def test_download_file_skips_current(file_server, tempfile_session, tmp_path):
+    path = tmp_path / 'docs-pdf-a4.zip'
+    downloader.download_file(tempfile_session, file_server.url, path)
+    got = downloader.download_file(tempfile_session, file_server.url, path)
+    assert got is False, (
+        'Функция `download_file` не должна загружать неизменившийся файл'
+    )
+    assert len(get_requests(file_server)) == 1
+
+
+def test_download_file_reloads_corrupted(
+        file_server, tempfile_session, tmp_path
+):
+    path = tmp_path / 'docs-pdf-a4.zip'
+    downloader.download_file(tempfile_session, file_server.url, path)
+    path.write_bytes(b'x' * len(file_server.payload))
+    assert downloader.download_file(
+        tempfile_session, file_server.url, path
+    ) is True, (
+        'Файл с неверной контрольной суммой должен загружаться заново'
+    )
+    assert path.read_bytes() == file_server.payload
+
+
+@pytest.mark.parametrize('ranges', [True, False])
+def test_download_file_resumes(
+        file_server, tempfile_session, tmp_path, ranges
+):
+    path = tmp_path / 'docs-pdf-a4.zip'
+    file_server.cut_at = 100000
+    with pytest.raises(ConnectionError):
+        downloader.download_file(tempfile_session, file_server.url, path)
+    assert not path.exists()
+    file_server.cut_at = None
+    file_server.ranges = ranges
+    assert downloader.download_file(
+        tempfile_session, file_server.url, path
+    ) is True
+    _, got_range = get_requests(file_server)[-1]
+    assert got_range and got_range.startswith('bytes='), (
+        'Прерванная загрузка должна продолжаться запросом Range'
+    )
+    assert path.read_bytes() == file_server.payload, (
+        'После докачки файл должен совпадать с файлом на сервере'
+    )
+
+
+def test_download_file_segments(
+        monkeypatch, file_server, tempfile_session, tmp_path
+):
+    monkeypatch.setattr(downloader, 'SEGMENT_MIN_SIZE', 0)
+    path = tmp_path / 'docs-pdf-a4.zip'
+    got = downloader.download_file(
+        tempfile_session, file_server.url, path, segments=4
+    )
+    assert got is True
+    assert path.read_bytes() == file_server.payload, (
+        'Файл, загруженный частями, должен совпадать с исходным'
+    )
+    length = len(file_server.payload)
+    assert sorted(get_requests(file_server)) == [
+        ('GET', f'bytes={start}-{start + length // 4 - 1}')
+        for start in range(0, length, length // 4)
+    ], 'Большой файл должен загружаться параллельными частями'
+    meta = downloader.read_json(path.with_name(path.name + '.json'))
+    assert meta['length'] == length
+
+
+def test_download_file_segments_resume(
+        monkeypatch, file_server, tempfile_session, tmp_path
+):
+    monkeypatch.setattr(downloader, 'SEGMENT_MIN_SIZE', 0)
+    path = tmp_path / 'docs-pdf-a4.zip'
+    length = len(file_server.payload)
+    part_path = path.with_name(path.name + '.part')
+    part_path.write_bytes(
+        file_server.payload[:length // 2] + bytes(length - length // 2)
+    )
+    downloader.write_json(
+        path.with_name(path.name + '.json'),
+        dict(
+            partial='segments', partial_etag=file_server.etag,
+            segments=[0, 1]
+        )
+    )
+    downloader.download_file(
+        tempfile_session, file_server.url, path, segments=4
+    )
+    assert path.read_bytes() == file_server.payload
+    assert len(get_requests(file_server)) == 2, (
+        'Загруженные части не должны загружаться повторно'
+    )
+
+
+def test_download_file_segments_without_etag(
+        monkeypatch, file_server, tempfile_session, tmp_path
+):
+    monkeypatch.setattr(downloader, 'SEGMENT_MIN_SIZE', 0)
+    file_server.etag = None
+    path = tmp_path / 'docs-pdf-a4.zip'
+    length = len(file_server.payload)
+    part_path = path.with_name(path.name + '.part')
+    part_path.write_bytes(bytes(length))
+    downloader.write_json(
+        path.with_name(path.name + '.json'),
+        dict(partial='segments', partial_etag=None, segments=[0, 1])
+    )
+    downloader.download_file(
+        tempfile_session, file_server.url, path, segments=4
+    )
+    assert path.read_bytes() == file_server.payload
+    assert len(get_requests(file_server)) == 4, (
+        'Без ETag прерванная загрузка частями должна начинаться заново'
+    )
+
+
+def test_download_file_stream_after_segments(
+        monkeypatch, file_server, tempfile_session, tmp_path
+):
+    monkeypatch.setattr(downloader, 'SEGMENT_MIN_SIZE', 0)
+    path = tmp_path / 'docs-pdf-a4.zip'
+    failed = []
+
+    def download_segment(session, url, part_path, segment, *args):
+        if segment[0] == 0:
+            failed.append(segment)
+            raise ConnectionError('Обрыв соединения')
+        return real_download_segment(session, url, part_path, segment, *args)
+
+    real_download_segment = downloader.download_segment
+    monkeypatch.setattr(downloader, 'download_segment', download_segment)
+    with pytest.raises(ConnectionError):
+        downloader.download_file(
+            tempfile_session, file_server.url, path, segments=4
+        )
+    assert failed
+    monkeypatch.undo()
+    assert downloader.download_file(
+        tempfile_session, file_server.url, path, segments=1
+    ) is True
+    assert path.read_bytes() == file_server.payload, (
+        'Загрузка одним потоком не должна продолжать '
+        'незавершённую загрузку частями'
+    )
@@ -1,9 +1,20 @@
+import io
+import subprocess
+import sys
+import zipfile
+from argparse import Namespace
+from contextlib import closing
 from pathlib import Path
+from types import GeneratorType
 
 import pytest
+import requests_mock
+from conftest import (PEP_CARD, PEP_INDEX_ROW, PEP_STATUSES, PEPS_MAIN_URL,
+                      SRC_DIR)
 
 try:
-    from src import main
+    from src import main, modes, storage
+    from src.records import RecordCache, key_parse
 except ModuleNotFoundError:
     assert False, 'Убедитесь что в директории `src` есть файл `main.py`'
 except ImportError:
@@ -35,9 +46,11 @@ def test_main_file():
 def test_whats_new(mock_session):
     got = main.whats_new(mock_session)
     header = ('Ссылка на статью', 'Заголовок', 'Редактор, Автор')
-    assert isinstance(got, list), (
-        'Функция `whats_new` должна возвращать объект типа `list`'
+    assert isinstance(got, GeneratorType), (
+        'Функция `whats_new` должна выдавать строки результата '
+        'по мере их получения'
     )
+    got = list(got)
     assert len(got) > 0, (
         'Убедитесь что функция `whats_new` модуля `main.py` '
         'возвращает непустой список'
@@ -56,9 +69,11 @@ def test_whats_new(mock_session):
 @pytest.mark.skip()
 def test_latest_versions(mock_session):
     got = main.latest_versions(mock_session)
-    assert isinstance(got, list), (
-        'Функция `latest_versions` должна возвращать объект типа `list`'
+    assert isinstance(got, GeneratorType), (
+        'Функция `latest_versions` должна выдавать строки результата '
+        'по мере их получения'
     )
+    got = list(got)
     assert isinstance(got[0], tuple), (
         'Функция `latest_versions` должна вернуть список `result`, '
         'элементами которого должны быть объекты типа `tuple`'
@@ -90,7 +105,7 @@ def test_latest_versions(mock_session):
 
 def test_download(monkeypatch, tmp_path, mock_session):
     mock_base_dir = Path(tmp_path)
-    monkeypatch.setattr(main, 'BASE_DIR', mock_base_dir)
+    monkeypatch.setattr(modes, 'BASE_DIR', mock_base_dir)
     got = main.download(mock_session)
     dirs = [
         directory for directory in mock_base_dir.iterdir()
@@ -114,6 +129,267 @@ def test_download(monkeypatch, tmp_path, mock_session):
     )
 
 
+def test_download_formats(
+        monkeypatch, tmp_path, file_server, tempfile_session
+):
+    monkeypatch.setattr(modes, 'BASE_DIR', tmp_path)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('docs/index.txt', 'Python ' * 1000)
+    file_server.payload = buffer.getvalue()
+    base_url = file_server.url.rsplit('/', 1)[0]
+    archives = ('docs-pdf-a4.zip', 'docs-html.tar.bz2', 'docs-text.zip')
+    links = ''.join(
+        f'<a href="{base_url}/{name}">{name}</a>' for name in archives
+    )
+    with requests_mock.Mocker(session=tempfile_session, real_http=True) as m:
+        m.get(
+            'https://docs.python.org/3/download.html',
+            text=f'<table class="docutils"><tr><td>{links}</td></tr></table>'
+        )
+        rows = list(main.download(
+            tempfile_session, Namespace(formats=True, segments=1, verify=True)
+        ))
+    assert sorted(row[0] for row in rows[1:-1]) == sorted(archives), (
+        'С `--formats` должны загружаться архивы во всех форматах'
+    )
+    assert rows[-1][-1] == '3 из 3'
+    manifest = modes.read_json(tmp_path / 'downloads' / 'manifest.json')
+    assert {
+        entry['file']: entry['members'] for entry in manifest['files']
+    } == {'docs-pdf-a4.zip': 1, 'docs-html.tar.bz2': None,
+          'docs-text.zip': 1}, (
+        'Для zip-архивов в манифест должно записываться число файлов'
+    )
+    assert (tmp_path / 'downloads' / 'docs-text.zip.index.json').exists()
+    assert all(
+        (tmp_path / 'downloads' / name).read_bytes() == file_server.payload
+        for name in archives
+    ), 'Загруженные архивы должны совпадать с исходными'
+
+
+@pytest.mark.parametrize('workers, parse_procs, stream', [
+    (1, 1, False),
+    (4, 1, False),
+    (4, 2, False),
+    (1, 1, True),
+    (4, 1, True),
+])
+def test_pep_workers(pep_pages, mock_session, workers, parse_procs, stream):
+    got = tuple(main.pep(mock_session, Namespace(
+        workers=workers, parse_procs=parse_procs,
+        stream=stream, cards=True
+    )))
+    assert got == (
+        ('Статус', 'Количество'),
+        ('Active', 2),
+        ('Final', 2),
+        ('Rejected', 1),
+        ('Total', 5),
+    ), (
+        'Функция `pep` должна возвращать одинаковый результат '
+        'при любых параметрах загрузки и разбора страниц.'
+    )
+
+
+PEP_TOTALS = (
+    ('Статус', 'Количество'),
+    ('Active', 2),
+    ('Final', 2),
+    ('Rejected', 1),
+    ('Total', 5),
+)
+
+
+def test_pep_json(pep_pages, mock_session, caplog):
+    got = tuple(main.pep(mock_session))
+    assert got == PEP_TOTALS, (
+        'Функция `pep` должна считать статусы по api/peps.json'
+    )
+    assert [request.url for request in pep_pages.request_history] == [
+        PEPS_MAIN_URL, f'{PEPS_MAIN_URL}api/peps.json'
+    ], 'Без --cards карточки PEP не должны загружаться'
+    assert 'pep-3333' in caplog.text, (
+        'Несовпадение статусов в общем списке и api/peps.json '
+        'должно выводиться в лог'
+    )
+    assert f'Статус в {PEPS_MAIN_URL}api/peps.json' in caplog.text, (
+        'В сообщении о несовпадении должен быть указан источник статуса'
+    )
+
+
+def test_pep_json_fallback(pep_pages, mock_session, caplog):
+    pep_pages.get(f'{PEPS_MAIN_URL}api/peps.json', text='Not Found')
+    got = tuple(main.pep(mock_session))
+    assert got == PEP_TOTALS, (
+        'При недоступности api/peps.json статусы должны '
+        'проверяться по карточкам PEP'
+    )
+    assert 'api/peps.json' in caplog.text
+    assert pep_pages.call_count == len(PEP_STATUSES) + 2
+    assert 'Статус в карточке' in caplog.text
+
+
+@pytest.mark.parametrize('parse_procs', [1, 2])
+def test_pep_meta(pep_pages, mock_session, parse_procs):
+    got = list(main.pep_meta(mock_session, Namespace(
+        workers=2, parse_procs=parse_procs
+    )))
+    assert got[0] == modes.PEP_FIELDS
+    status = modes.PEP_FIELDS.index('Status')
+    assert [(row[0], row[status]) for row in got[1:]] == [
+        (number, card_status)
+        for number, (_, card_status) in PEP_STATUSES.items()
+    ], (
+        'Режим `pep-meta` должен выдавать таблицу заголовков '
+        'каждой карточки PEP'
+    )
+    assert all(
+        isinstance(row[0], int) and all(
+            isinstance(value, str) for value in row[1:]
+        )
+        for row in got[1:]
+    ), 'Номер PEP должен быть числом, остальные поля - строками'
+
+
+def test_pep_meta_records(pep_pages, mock_session, tmp_path):
+    mock_session.records = RecordCache(tmp_path / 'records.json')
+    got = list(main.pep_meta(mock_session))
+    rows = [
+        record for key, (_, record) in mock_session.records.records.items()
+        if key_parse(key) == modes.pep_card_row.__qualname__
+    ]
+    assert len(rows) == len(got) - 1
+    assert all(
+        list(row) == list(values[1:]) for row, values in zip(rows, got[1:])
+    ), (
+        'В кеше записей должны храниться только значения полей '
+        'карточки PEP в порядке PEP_FIELDS'
+    )
+
+
+def test_pep_card_meta():
+    card = PEP_CARD.format(number=8, status='Active', body='').replace(
+        'Title', 'Style Guide for Python Code'
+    ).replace('Guido van Rossum', 'Guido van Rossum,\n   Barry Warsaw')
+    assert modes.pep_card_meta(card) == {
+        'Title': 'Style Guide for Python Code',
+        'Status': 'Active',
+        'Author': 'Guido van Rossum, Barry Warsaw',
+    }, 'Из карточки PEP должна извлекаться вся таблица заголовков'
+
+
+@pytest.mark.parametrize('parse_procs', [1, 2])
+def test_pep_records(pep_pages, mock_session, tmp_path, parse_procs):
+    mock_session.records = RecordCache(tmp_path / 'records.json')
+    cli_args = Namespace(parse_procs=parse_procs, cards=True)
+    expected = tuple(main.pep(mock_session, cli_args))
+    mock_session.records.save()
+    mock_session.records = RecordCache(tmp_path / 'records.json')
+    assert tuple(main.pep(mock_session, cli_args)) == expected
+    assert mock_session.records.misses == 0, (
+        'При повторном запуске неизменившиеся страницы '
+        'не должны разбираться заново'
+    )
+    assert mock_session.records.hits == len(PEP_STATUSES) + 1
+
+
+def test_run_modes(pep_pages, mock_session, capsys, caplog):
+    assert main.batch_modes(['pep', 'all']) == list(main.BATCH_MODES)
+    main.run_modes(mock_session, Namespace(output=None), ['pep', 'history'])
+    assert 'Total 5' in capsys.readouterr().out, (
+        'Результаты каждого режима должны выводиться через `control_output`'
+    )
+    assert 'history' in caplog.text, (
+        'Сбой одного режима не должен прерывать остальные'
+    )
+
+
+def test_run_modes_output_error(pep_pages, mock_session, monkeypatch, caplog):
+    printed = []
+
+    def control_output(results, cli_args):
+        if cli_args.mode == 'pep':
+            raise OSError('Нет места на диске')
+        printed.append(cli_args.mode)
+
+    monkeypatch.setattr(main, 'control_output', control_output)
+    main.run_modes(mock_session, Namespace(output=None), ['pep', 'pep-meta'])
+    assert printed == ['pep-meta'], (
+        'Сбой вывода результатов одного режима не должен прерывать остальные'
+    )
+    assert 'Нет места на диске' in caplog.text
+
+
+def test_pep_incremental(pep_pages, mock_session, monkeypatch, tmp_path):
+    monkeypatch.setattr(modes, 'BASE_DIR', tmp_path)
+
+    def card(number, card_status):
+        def _card(request, context):
+            context.headers['ETag'] = f'"{number}"'
+            if request.headers.get('If-None-Match') == f'"{number}"':
+                context.status_code = 304
+                return ''
+            return PEP_CARD.format(
+                number=number, status=card_status, body=''
+            )
+        return _card
+
+    for number, (_, card_status) in PEP_STATUSES.items():
+        pep_pages.get(
+            f'{PEPS_MAIN_URL}pep-{number:04d}/',
+            text=card(number, card_status)
+        )
+    cli_args = Namespace(incremental=True)
+    first = list(main.pep(mock_session, cli_args))
+    pep_pages.reset_mock()
+    second = list(main.pep(mock_session, cli_args))
+    assert first == second, (
+        'Повторный запуск `pep` с `--incremental` должен давать '
+        'тот же результат'
+    )
+    card_responses = [
+        request for request in pep_pages.request_history
+        if request.url != PEPS_MAIN_URL
+    ]
+    assert card_responses and all(
+        request.headers.get('If-None-Match') for request in card_responses
+    ), (
+        'При повторном запуске карточки PEP должны проверяться '
+        'условным запросом'
+    )
+
+
+def test_diff_and_history(monkeypatch, tmp_path):
+    monkeypatch.setattr(modes, 'BASE_DIR', tmp_path)
+    header = ('Ссылка на документацию', 'Версия', 'Статус')
+    url = 'https://docs.python.org/3.12/'
+    with closing(storage.connect(tmp_path / 'results.sqlite3')) as connection:
+        storage.save_results(connection, 'latest-versions', '2024-01-01', [
+            header, (url, '3.12', 'in development')
+        ])
+        storage.save_results(connection, 'latest-versions', '2024-02-01', [
+            header, (url, '3.12', 'stable')
+        ])
+    got = list(main.diff(None, Namespace(target='latest-versions')))
+    assert got == [
+        ('Ключ', '2024-01-01', '2024-02-01'),
+        (
+            url,
+            f'{url}, 3.12, in development',
+            f'{url}, 3.12, stable'
+        ),
+    ], 'Режим `diff` должен показывать изменившиеся строки'
+    got = list(main.history(
+        None, Namespace(target='latest-versions', key=url)
+    ))
+    assert got == [
+        ('Запуск', *header),
+        ('2024-01-01', url, '3.12', 'in development'),
+        ('2024-02-01', url, '3.12', 'stable'),
+    ], 'Режим `history` должен показывать изменения строки по запускам'
+
+
 def test_mode_to_function():
     got = main.MODE_TO_FUNCTION
     assert isinstance(got, dict), (
@@ -125,7 +401,11 @@ def test_mode_to_function():
             f'{name_func} - это строка.'
         )
         assert (
-            name_func in ['whats-new', 'latest-versions', 'download', 'pep']
+            name_func in [
+                'whats-new', 'whats-new-peps', 'latest-versions',
+                'download', 'pep', 'pep-meta', 'history', 'diff', 'watch',
+                'serve'
+            ]
         ), (
             'В модуле `main.py` в объекте `MODE_TO_FUNCTION` '
             f'нет ключа `{name_func}`'
@@ -136,9 +416,148 @@ def test_mode_to_function():
         )
         assert (
             func.__name__ in [
-                'whats_new', 'latest_versions', 'download', 'pep'
+                'whats_new', 'whats_new_peps', 'latest_versions',
+                'download', 'pep', 'pep_meta', 'history', 'diff', 'watch',
+                'serve'
             ]
         ), (
             'В модуле `main.py` в объекте `MODE_TO_FUNCTION` '
             f'нет значения {func}'
         )
+
+
+def pep_index(statuses):
+    rows = ''.join(
+        PEP_INDEX_ROW.format(
+            type='Standards Track', status=status, abbr='S', number=number
+        )
+        for number, status in statuses.items()
+    )
+    return f'<section id="numerical-index"><table><tr></tr>{rows}</table>'
+
+
+def test_watch_events(mock_session, monkeypatch):
+    monkeypatch.setattr(modes.time, 'sleep', lambda delay: None)
+    cli_args = Namespace(
+        interval=['pep=1', 'latest-versions=0', 'whats-new=0']
+    )
+    with requests_mock.Mocker() as mock:
+        mock.get(PEPS_MAIN_URL, [
+            dict(text=pep_index({1: 'Draft'}), headers={'ETag': '"1"'}),
+            dict(status_code=304),
+            dict(text=pep_index({1: 'Final', 2: 'Draft'})),
+        ])
+        events = modes.watch_events(mock_session, cli_args)
+        got = [next(events), next(events)]
+        assert mock.request_history[1].headers['If-None-Match'] == '"1"', (
+            'Режим watch должен проверять страницы условными запросами'
+        )
+    assert got == [
+        dict(
+            event='pep-status', url=f'{PEPS_MAIN_URL}pep-0001/',
+            old='Draft', new='Final'
+        ),
+        dict(event='pep-added', url=f'{PEPS_MAIN_URL}pep-0002/',
+             status='Draft'),
+    ], 'Режим watch должен выдавать только изменения'
+    with pytest.raises(ValueError):
+        modes.watch_intervals(['unknown=10'])
+    with pytest.raises(ValueError):
+        modes.watch_intervals(
+            ['pep=0', 'latest-versions=0', 'whats-new=0']
+        )
+
+
+def test_watch_events_parse_error(mock_session, monkeypatch, caplog):
+    monkeypatch.setattr(modes.time, 'sleep', lambda delay: None)
+    cli_args = Namespace(
+        interval=['pep=1', 'latest-versions=0', 'whats-new=0']
+    )
+    broken = pep_index({}).replace(
+        '</table>', '<tr><td><a href="pep-0001/">1</a></td></tr></table>'
+    )
+    with requests_mock.Mocker() as mock:
+        mock.get(PEPS_MAIN_URL, [
+            dict(text=pep_index({1: 'Draft'})),
+            dict(text=broken),
+            dict(text=pep_index({1: 'Final'})),
+        ])
+        event = next(modes.watch_events(mock_session, cli_args))
+    assert event == dict(
+        event='pep-status', url=f'{PEPS_MAIN_URL}pep-0001/',
+        old='Draft', new='Final'
+    ), 'После ошибки разбора должно сохраняться прежнее состояние'
+    assert 'Не удалось разобрать страницу' in caplog.text
+
+
+WHATS_NEW_ARTICLE = (
+    '<html><body><section><h1>What’s New In Python {version}'
+    '<a class="headerlink" href="#top">¶</a></h1>'
+    '<section><h2>New Features<a class="headerlink" href="#nf">¶</a></h2>'
+    '<p><a class="pep reference external" '
+    'href="https://peps.python.org/pep-{first:04d}/"><strong>PEP {first}'
+    '</strong></a></p></section>'
+    '<section><h2>Other Changes</h2><p><a class="pep reference external" '
+    'href="https://peps.python.org/pep-{second:04d}/">PEP {second}</a>, '
+    '<a href="https://peps.python.org/pep-{first:04d}/#spec">again</a>'
+    '</p></section></section></body></html>'
+)
+
+
+def test_whats_new_peps(mock_session):
+    whats_new_url = 'https://docs.python.org/3/whatsnew/'
+    with requests_mock.Mocker() as mock:
+        mock.get(PEPS_MAIN_URL, text=pep_index({8: 'Active', 3000: 'Final'}))
+        mock.get(whats_new_url, text=(
+            '<ul><li class="toctree-l1"><a href="3.12.html">3.12</a></li>'
+            '<li class="toctree-l1"><a href="3.11.html">3.11</a></li></ul>'
+        ))
+        mock.get(f'{whats_new_url}3.12.html', text=WHATS_NEW_ARTICLE.format(
+            version='3.12', first=3000, second=9999
+        ))
+        mock.get(f'{whats_new_url}3.11.html', text=WHATS_NEW_ARTICLE.format(
+            version='3.11', first=8, second=3000
+        ))
+        got = list(main.whats_new_peps(mock_session))
+        assert mock.call_count == 4, (
+            'Каждая страница должна загружаться один раз'
+        )
+    assert got == [
+        ('Версия', 'PEP', 'Статус', 'Раздел', 'Ссылка на статью'),
+        ('3.12', 3000, 'Final', 'New Features', f'{whats_new_url}3.12.html'),
+        ('3.12', 9999, modes.PEP_UNKNOWN, 'Other Changes',
+         f'{whats_new_url}3.12.html'),
+        ('3.11', 8, 'Active', 'New Features', f'{whats_new_url}3.11.html'),
+        ('3.11', 3000, 'Final', 'Other Changes',
+         f'{whats_new_url}3.11.html'),
+    ], (
+        'Режим `whats-new-peps` должен связывать PEP из статей '
+        'о нововведениях со статусами из общего списка PEP'
+    )
+
+
+def import_times(module):
+    '''Время импорта модулей с вложенными импортами по -X importtime.'''
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=SRC_DIR, capture_output=True, text=True, check=True
+    ).stderr
+    times = {}
+    for line in stderr.splitlines()[1:]:
+        _, cumulative, name = line.split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_startup_imports():
+    times = import_times('main')
+    heavy = {
+        'requests', 'requests_cache', 'bs4', 'lxml', 'tqdm', 'prettytable'
+    } & set(times)
+    assert not heavy, (
+        'Импорт `main.py` не должен загружать тяжёлые зависимости '
+        f'до разбора аргументов: {sorted(heavy)}'
+    )
+    assert times['main'] < import_times('modes')['modes'], (
+        'Импорт `main.py` должен быть быстрее импорта режимов парсера'
+    )
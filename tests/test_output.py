@@ -82,6 +82,95 @@ def test_control_output_file(monkeypatch, tmp_path, records, cli_arg):
     )
 
 
+def test_control_output_file_incremental(monkeypatch, tmp_path, records):
+    monkeypatch.setattr(outputs, 'BASE_DIR', Path(tmp_path))
+    rows = records('pep')
+
+    def broken_results():
+        yield from rows[:3]
+        raise ConnectionError('Сбой посреди парсинга')
+
+    with pytest.raises(ConnectionError):
+        outputs.control_output(broken_results(), cli_args('pep', 'file'))
+    output_file, = Path(tmp_path).glob('results/*.csv')
+    assert len(output_file.read_text(encoding='utf-8').splitlines()) == 3, (
+        'Функция `file_output` должна записывать строки в файл '
+        'по мере их получения'
+    )
+
+
+@pytest.mark.parametrize('output_format', ['parquet', 'arrow'])
+@pytest.mark.parametrize('mode', ['whats-new', 'latest-versions', 'pep'])
+def test_control_output_columnar(
+        monkeypatch, tmp_path, records, mode, output_format
+):
+    pa = pytest.importorskip('pyarrow')
+    monkeypatch.setattr(outputs, 'BASE_DIR', Path(tmp_path))
+    monkeypatch.setattr(outputs, 'BATCH_SIZE', 2)
+    rows = records(mode)
+    if mode == 'pep':
+        rows = [rows[0], *((status, int(count)) for status, count in rows[1:])]
+    outputs.control_output(iter(rows), cli_args(mode, output_format))
+    output_file, = Path(tmp_path).glob(f'results/*.{output_format}')
+    if output_format == 'parquet':
+        table = pytest.importorskip('pyarrow.parquet').read_table(output_file)
+    else:
+        table = pa.ipc.open_file(output_file).read_all()
+    assert table.column_names == list(rows[0]), (
+        'Имена колонок должны совпадать с заголовком результата'
+    )
+    assert [tuple(row.values()) for row in table.to_pylist()] == rows[1:], (
+        f'Проверьте сохранение результатов в формате {output_format}'
+    )
+
+
+@pytest.mark.parametrize('mode', ['whats-new', 'latest-versions', 'pep'])
+def test_table_lines_small(records, mode):
+    prettytable = pytest.importorskip('prettytable')
+    rows = [*records(mode), ('Много\nстрок', *([None] * (
+        len(records(mode)[0]) - 1
+    )))]
+    table = prettytable.PrettyTable()
+    table.field_names = rows[0]
+    table.align = 'l'
+    table.add_rows(rows[1:])
+    assert '\n'.join(outputs.table_lines(iter(rows))) == str(table), (
+        'Небольшие таблицы должны выглядеть так же, как в PrettyTable'
+    )
+
+
+def test_table_lines_streaming():
+    rows = [('A', 'B'), ('x', 'y'), ('wide', 'y'), ('x', 'y'), ('x', 'y')]
+    got = list(outputs.table_lines(iter(rows), sample_size=1, page_size=2))
+    assert got == [
+        '+---+---+', '| A | B |', '+---+---+',
+        '| x | y |',
+        '+------+---+', '| A    | B |', '+------+---+',
+        '| wide | y |', '| x    | y |',
+        '+------+---+', '| A    | B |', '+------+---+',
+        '| x    | y |',
+        '+------+---+',
+    ], (
+        'Ширина колонок должна определяться по выборке строк, '
+        'а при расширении колонки или новой странице заголовок '
+        'выводится заново'
+    )
+    assert list(outputs.table_lines([('A',), ('abcdef',)], max_width=4)) == [
+        '+------+', '| A    |', '+------+', '| abc… |', '+------+'
+    ], 'Длинные ячейки должны обрезаться до --max-width'
+    assert [
+        outputs.text_width(line) for line in outputs.table_lines(
+            [('A',), ('日本語のテキスト',)], max_width=5
+        )
+    ] == [9] * 5, (
+        'Ширина обрезанной ячейки с широкими символами '
+        'не должна превышать --max-width'
+    )
+    assert list(outputs.table_lines(iter([]))) == [], (
+        'Пустой результат не должен приводить к ошибке'
+    )
+
+
 def test_output_file():
     assert hasattr(outputs, 'control_output'), (
         'Напишите функцию `control_output` в модуле `output.py`'
@@ -92,3 +181,47 @@ def test_output_file():
     assert hasattr(outputs, 'file_output'), (
         'Напишите функцию `file_output` в модуле `output.py`'
     )
+
+
+@pytest.mark.parametrize('output_format', ['parquet', 'arrow'])
+def test_columnar_output_promotes_types(monkeypatch, tmp_path, output_format):
+    pa = pytest.importorskip('pyarrow')
+    monkeypatch.setattr(outputs, 'BASE_DIR', Path(tmp_path))
+    monkeypatch.setattr(outputs, 'BATCH_SIZE', 2)
+    rows = [
+        ('Имя', 'Число', 'Примечание'),
+        ('a', 1, None), ('b', 2, None),
+        ('c', 2.5, None), ('d', None, 'есть'),
+        ('e', 3, None),
+    ]
+    outputs.control_output(iter(rows), cli_args('pep', output_format))
+    output_file, = Path(tmp_path).glob(f'results/*.{output_format}')
+    if output_format == 'parquet':
+        table = pytest.importorskip('pyarrow.parquet').read_table(output_file)
+    else:
+        table = pa.ipc.open_file(output_file).read_all()
+    assert [field.type for field in table.schema] == [
+        pa.string(), pa.float64(), pa.string()
+    ], (
+        'Типы колонок должны расширяться по всем пакетам, '
+        'а не определяться по первому'
+    )
+    assert [tuple(row.values()) for row in table.to_pylist()] == rows[1:]
+
+
+@pytest.mark.parametrize('output_format', ['parquet', 'arrow'])
+def test_columnar_output_empty(monkeypatch, tmp_path, output_format):
+    pa = pytest.importorskip('pyarrow')
+    monkeypatch.setattr(outputs, 'BASE_DIR', Path(tmp_path))
+    outputs.control_output(
+        iter([('Статус', 'Количество')]), cli_args('pep', output_format)
+    )
+    output_file, = Path(tmp_path).glob(f'results/*.{output_format}')
+    if output_format == 'parquet':
+        table = pytest.importorskip('pyarrow.parquet').read_table(output_file)
+    else:
+        table = pa.ipc.open_file(output_file).read_all()
+    assert table.num_rows == 0
+    assert table.schema == pa.schema(
+        [('Статус', pa.string()), ('Количество', pa.string())]
+    ), 'Для результата без строк сохраняется файл с заголовком'
@@ -0,0 +1,33 @@
+try:
+    from src import peps
+except ModuleNotFoundError:
+    assert False, 'Убедитесь что в директории `src` есть файл `peps.py`'
+except ImportError:
+    assert False, 'Убедитесь что в директории `src` есть файл `peps.py`'
+
+HEADER = {
+    'Title': 'Style Guide for Python Code',
+    'Author': 'Guido van Rossum, Barry Warsaw, Alyssa Coghlan',
+    'Status': 'Active',
+    'Type': 'Process',
+    'Created': '05-Jul-2001',
+    'Post-History': '05-Jul-2001, 01-Aug-2013',
+}
+
+
+def test_pep_meta():
+    record = peps.PepMeta('8', HEADER)
+    assert not hasattr(record, '__dict__'), (
+        'Запись PepMeta должна хранить поля в слотах'
+    )
+    assert tuple(record) == tuple(
+        8 if field == 'PEP' else HEADER.get(field, '')
+        for field in peps.PEP_FIELDS
+    ), 'Запись должна содержать все поля таблицы заголовков PEP'
+    other = peps.PepMeta(20, dict(
+        Status=''.join(['Act', 'ive']), Type='Informational'
+    ))
+    assert other.status is record.status, (
+        'Значения категориальных полей должны интернироваться'
+    )
+    assert other.created == ''
@@ -0,0 +1,49 @@
+import json
+import time
+from argparse import Namespace
+
+try:
+    from src import profiling
+except ModuleNotFoundError:
+    assert False, 'Убедитесь что в директории `src` есть файл `profiling.py`'
+except ImportError:
+    assert False, 'Убедитесь что в директории `src` есть файл `profiling.py`'
+
+
+@profiling.profiled('parse', size=lambda result, text: len(text))
+def parse(text):
+    time.sleep(0.01)
+    return text.upper()
+
+
+@profiling.profiled('output')
+def output(texts):
+    for text in texts:
+        parse(text)
+
+
+def test_profiled_disabled():
+    assert parse('abc') == 'ABC'
+    assert not profiling.profiler.durations, (
+        'Без включённого профилирования замеры не должны сохраняться'
+    )
+
+
+def test_run_profiled(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, 'BASE_DIR', tmp_path)
+    cli_args = Namespace(mode='pep', cprofile=True)
+    profiling.run_profiled(output, cli_args, ['abc', 'defg'])
+    report_path, = tmp_path.glob('profiles/pep_*.json')
+    report = json.loads(report_path.read_text(encoding='utf-8'))
+    assert report_path.with_suffix('.prof').exists(), (
+        'С флагом `--cprofile` рядом с отчётом сохраняется дамп cProfile'
+    )
+    phases = report['phases']
+    assert phases['parse']['count'] == 2
+    assert phases['parse']['bytes'] == 7
+    assert phases['output']['count'] == 1
+    assert phases['output']['self'] < phases['output']['total'], (
+        'Собственное время фазы не должно включать вложенные фазы'
+    )
+    assert {'p50', 'p90', 'p99', 'max'} <= phases['parse'].keys()
+    assert report['wall'] >= phases['output']['total']
@@ -0,0 +1,149 @@
+import threading
+import time
+from argparse import Namespace
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+try:
+    from src import ratelimit, sessions
+except ModuleNotFoundError:
+    assert False, 'Убедитесь что в директории `src` есть файл `ratelimit.py`'
+except ImportError:
+    assert False, 'Убедитесь что в директории `src` есть файл `ratelimit.py`'
+
+
+class ThrottlingHandler(BaseHTTPRequestHandler):
+    '''Отвечает 429, если одновременных запросов больше capacity.'''
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            overloaded = server.in_flight > server.capacity
+        time.sleep(0.01)
+        with server.lock:
+            server.in_flight -= 1
+        if overloaded:
+            server.throttled += 1
+            self.send_response(429)
+            self.send_header('Retry-After', '0')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = b'<h1>OK</h1>'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def throttling_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ThrottlingHandler)
+    server.lock = threading.Lock()
+    server.in_flight = server.throttled = 0
+    server.capacity = 2
+    server.url = 'http://127.0.0.1:{}/'.format(server.server_address[1])
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_retry_after_seconds():
+    assert ratelimit.retry_after_seconds('3') == 3
+    assert ratelimit.retry_after_seconds(None) == 0
+    delay = ratelimit.retry_after_seconds(formatdate(time.time() + 60))
+    assert 50 < delay <= 60, (
+        'Заголовок Retry-After может содержать HTTP-дату'
+    )
+
+
+def test_host_limiter_aimd():
+    limiter = ratelimit.HostLimiter(max_concurrency=4)
+    for _ in range(20):
+        limiter.acquire()
+        limiter.release(0.01)
+    assert limiter.concurrency == 4, (
+        'Число одновременных запросов должно расти до максимума '
+        'при быстрых успешных ответах'
+    )
+    rate = limiter.rate
+    limiter.acquire()
+    limiter.release(0.01, 429)
+    assert (limiter.concurrency, limiter.rate) == (2, rate / 2), (
+        'Ответ 429 должен вдвое уменьшать частоту и число запросов'
+    )
+    limiter.acquire()
+    limiter.release(1)
+    assert limiter.concurrency < 2, (
+        'Рост задержки должен уменьшать число одновременных запросов'
+    )
+
+
+def test_host_limiter_failed_request():
+    limiter = ratelimit.HostLimiter(max_concurrency=4)
+    limiter.concurrency = 4
+    limiter.acquire()
+    limiter.release(0.5)
+    rate = limiter.rate
+    limiter.acquire()
+    limiter.release(0.001, failed=True)
+    assert (limiter.concurrency, limiter.rate) == (2, rate / 2), (
+        'Ошибка соединения должна вдвое уменьшать частоту и число запросов'
+    )
+    assert limiter.min_latency == 0.5, (
+        'Задержка неудачного запроса не должна учитываться'
+    )
+    assert limiter.in_flight == 0
+
+
+def test_host_limiter_bounds_in_flight():
+    limiter = ratelimit.HostLimiter(max_concurrency=2, rate=1000)
+    limiter.concurrency = 2
+    peak = []
+
+    def work():
+        limiter.acquire()
+        peak.append(limiter.in_flight)
+        time.sleep(0.01)
+        limiter.release(0.01)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(peak) <= 2, (
+        'Одновременных запросов не должно быть больше допустимого'
+    )
+
+
+def test_session_rate_limit(throttling_server):
+    session = sessions.create_session(
+        Namespace(cache_backend='memory', workers=8, rate_limit=True)
+    )
+    urls = [
+        '{}{}'.format(throttling_server.url, number) for number in range(40)
+    ]
+    threads = [
+        threading.Thread(target=session.get, args=(url,)) for url in urls
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    limits = sessions.session_stats(session)['limits']['127.0.0.1']
+    assert limits['concurrency'] <= 8, (
+        'Ограничитель не должен превышать число потоков загрузки'
+    )
+    assert throttling_server.throttled < len(urls) // 4, (
+        'Ограничитель должен снижать нагрузку после ответов 429'
+    )
@@ -0,0 +1,106 @@
+try:
+    from src import records
+except ModuleNotFoundError:
+    assert False, 'Убедитесь что в директории `src` есть файл `records.py`'
+except ImportError:
+    assert False, 'Убедитесь что в директории `src` есть файл `records.py`'
+
+URL = 'https://peps.python.org/pep-0008/'
+
+
+def test_record_cache(tmp_path):
+    calls = []
+
+    def parse(text):
+        calls.append(text)
+        return [text.upper()]
+
+    path = tmp_path / 'records.json'
+    cache = records.RecordCache(path)
+    assert cache.extract(parse, URL, 'abc') == ['ABC']
+    cache.save()
+    cache = records.RecordCache(path)
+    assert cache.extract(parse, URL, 'abc') == ['ABC']
+    assert calls == ['abc'], (
+        'Запись для неизменившейся страницы должна браться из кеша'
+    )
+    assert cache.extract(parse, URL, 'abcd') == ['ABCD']
+    assert calls == ['abc', 'abcd'], (
+        'При изменении страницы запись должна извлекаться заново'
+    )
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.clear()
+    assert cache.lookup(parse, URL, 'abcd') is None
+
+
+def test_record_cache_versions_and_prune(tmp_path):
+    def parse(text):
+        return [text.upper()]
+
+    def other(text):
+        return [text]
+
+    path = tmp_path / 'records.json'
+    cache = records.RecordCache(path)
+    cache.extract(parse, URL, 'abc')
+    cache.extract(parse, URL + 'old/', 'abc')
+    cache.extract(other, URL, 'abc')
+    cache.save()
+
+    def parse(text):
+        return {'text': text}
+
+    cache = records.RecordCache(path)
+    assert cache.extract(parse, URL, 'abc') == {'text': 'abc'}, (
+        'После изменения функции извлечения её записи '
+        'должны извлекаться заново'
+    )
+    cache.save()
+    assert sorted(
+        records.key_parse(key).rsplit('.', 1)[-1] for key in cache.records
+    ) == ['other', 'parse'], (
+        'При сохранении должны удаляться записи, к которым не обращались '
+        'в запуске, а записи других функций - сохраняться'
+    )
+
+
+def test_parse_name_follows_helpers():
+    namespace = {}
+    exec(
+        'FIELDS = ("Status",)\n'
+        'def helper(text):\n    return text.upper()\n'
+        'def parse(text):\n    return [helper(text), FIELDS]\n',
+        namespace
+    )
+    parse_name = records.parse_name.__wrapped__
+    name = parse_name(namespace['parse'])
+    exec('def helper(text):\n    return text.lower()\n', namespace)
+    assert parse_name(namespace['parse']) != name, (
+        'Версия функции извлечения должна меняться при изменении '
+        'вызываемых ею функций'
+    )
+    name = parse_name(namespace['parse'])
+    namespace['FIELDS'] = ('Status', 'Type')
+    assert parse_name(namespace['parse']) != name, (
+        'Версия функции извлечения должна меняться при изменении '
+        'используемых ею констант'
+    )
+
+
+def test_record_cache_keeps_failed_pages(tmp_path):
+    def parse(text):
+        return [text.upper()]
+
+    path = tmp_path / 'records.json'
+    cache = records.RecordCache(path)
+    cache.extract(parse, URL, 'abc')
+    cache.extract(parse, URL + 'failed/', 'abc')
+    cache.save()
+    cache = records.RecordCache(path)
+    cache.extract(parse, URL, 'abc')
+    cache.touch(parse, URL + 'failed/')
+    cache.save()
+    assert len(cache.records) == 2, (
+        'Записи страниц, которые не удалось загрузить, '
+        'не должны удаляться при сохранении'
+    )
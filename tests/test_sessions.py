@@ -0,0 +1,109 @@
+import threading
+from argparse import Namespace
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests_mock
+
+try:
+    from src import sessions
+except ModuleNotFoundError:
+    assert False, 'Убедитесь что в директории `src` есть файл `sessions.py`'
+except ImportError:
+    assert False, 'Убедитесь что в директории `src` есть файл `sessions.py`'
+
+URL = 'https://peps.python.org/pep-{number:04d}/'
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    '''Первые запросы завершаются ошибкой 503 или разрывом соединения.'''
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        server.attempts += 1
+        if server.attempts <= server.failures:
+            if server.reset:
+                self.close_connection = True
+                return
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = b'<h1>OK</h1>'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def flaky_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FlakyHandler)
+    server.attempts = 0
+    server.failures = 2
+    server.reset = False
+    server.url = 'http://127.0.0.1:{}/'.format(server.server_address[1])
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_parse_expire_after():
+    got = sessions.parse_expire_after(['peps.python.org/=60'])
+    assert list(got.items())[0] == ('peps.python.org/', 60), (
+        'Сроки хранения из командной строки должны проверяться первыми'
+    )
+    assert got['peps.python.org/pep-*'] == timedelta(days=30)
+    with pytest.raises(ValueError):
+        sessions.parse_expire_after(['peps.python.org/'])
+
+
+def test_trim_cache_evicts_least_recently_used(tmp_path):
+    session = sessions.create_session(Namespace(cache_backend='memory'))
+    urls = [URL.format(number=number) for number in range(3)]
+    with requests_mock.Mocker() as mock:
+        for url in urls:
+            mock.get(url, text='x' * 1000)
+            session.get(url)
+        session.get(urls[0])
+    count, size = sessions.trim_cache(
+        session, 2500, access_log_path=tmp_path / 'access.json'
+    )
+    assert (count, size) == (1, 2000), (
+        'Функция `trim_cache` должна вытеснять ответы, пока кеш '
+        'не станет меньше заданного размера'
+    )
+    assert session.cache.contains(url=urls[0]), (
+        'Ответ, к которому обращались последним, должен остаться в кеше'
+    )
+    assert not session.cache.contains(url=urls[1])
+
+
+@pytest.mark.parametrize('reset, reason', [
+    (False, '503'),
+    (True, 'ProtocolError'),
+])
+def test_session_retries(monkeypatch, flaky_server, reset, reason):
+    monkeypatch.setattr(sessions, 'BACKOFF_FACTOR', 0.01)
+    monkeypatch.setattr(sessions, 'BACKOFF_JITTER', 0.01)
+    flaky_server.reset = reset
+    session = sessions.create_session(
+        Namespace(cache_backend='memory', workers=4)
+    )
+    response = session.get(flaky_server.url)
+    assert response.status_code == 200, (
+        'Сессия должна повторять запросы при ответах 5xx '
+        'и разорванных соединениях'
+    )
+    stats = sessions.session_stats(session)
+    assert stats['retries'] == {reason: 2}, (
+        'Статистика сессии должна учитывать повторы по причинам'
+    )
+    assert stats['requests'] == 3
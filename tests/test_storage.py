@@ -0,0 +1,90 @@
+from contextlib import closing
+
+import pytest
+
+try:
+    from src import storage
+except ModuleNotFoundError:
+    assert False, 'Убедитесь что в директории `src` есть файл `storage.py`'
+except ImportError:
+    assert False, 'Убедитесь что в директории `src` есть файл `storage.py`'
+
+HEADER = ('Статус', 'Количество')
+
+
+@pytest.fixture
+def connection(tmp_path):
+    with closing(storage.connect(tmp_path / 'results.sqlite3')) as connection:
+        yield connection
+
+
+def test_save_results_upserts(connection):
+    storage.save_results(connection, 'pep', '2024-01-01', iter([
+        HEADER, ('Active', 30), ('Total', 30)
+    ]))
+    storage.save_results(connection, 'pep', '2024-01-01', iter([
+        HEADER, ('Active', 31), ('Total', 31)
+    ]))
+    assert storage.run_rows(connection, 'pep', '2024-01-01') == {
+        'Active': ('Active', 31), 'Total': ('Total', 31)
+    }, 'Повторное сохранение запуска должно обновлять строки'
+    assert storage.run_header(connection, 'pep', '2024-01-01') == HEADER
+
+
+def test_save_results_single_transaction(connection):
+    def broken_results():
+        yield HEADER
+        yield ('Active', 30)
+        raise ConnectionError
+
+    with pytest.raises(ConnectionError):
+        storage.save_results(connection, 'pep', '2024-01-01', broken_results())
+    assert storage.last_runs(connection, 'pep') == [], (
+        'Прерванный запуск не должен оставлять строк в базе'
+    )
+
+
+def test_diff_runs(connection):
+    storage.save_results(connection, 'pep', '2024-01-01', [
+        HEADER, ('Active', 30), ('Draft', 5)
+    ])
+    storage.save_results(connection, 'pep', '2024-02-01', [
+        HEADER, ('Active', 31), ('Final', 1)
+    ])
+    assert storage.last_runs(connection, 'pep') == [
+        '2024-02-01', '2024-01-01'
+    ]
+    assert list(storage.diff_runs(
+        connection, 'pep', '2024-01-01', '2024-02-01'
+    )) == [
+        ('Active', ('Active', 30), ('Active', 31)),
+        ('Draft', ('Draft', 5), None),
+        ('Final', None, ('Final', 1)),
+    ]
+
+
+def test_row_keys(connection):
+    storage.save_results(connection, 'whats-new-peps', '2024-01-01', [
+        ('Версия', 'PEP', 'Статус'),
+        ('3.12', 695, 'Final'), ('3.12', 701, 'Final'), ('3.11', 654, 'Final')
+    ])
+    storage.save_results(connection, 'whats-new', '2024-01-01', [
+        ('Ссылка', 'Заголовок'), ('a', 'x'), ('a', 'y')
+    ])
+    assert storage.run_rows(connection, 'whats-new-peps', '2024-01-01') == {
+        '3.12 695': ('3.12', 695, 'Final'),
+        '3.12 701': ('3.12', 701, 'Final'),
+        '3.11 654': ('3.11', 654, 'Final'),
+    }, 'Строки с одинаковой первой колонкой не должны перезаписываться'
+    assert storage.run_rows(connection, 'whats-new', '2024-01-01') == {
+        'a': ('a', 'x'), 'a #2': ('a', 'y')
+    }
+
+
+def test_last_runs_since_date(connection):
+    for run_at in ('2024-01-01_10-00-00', '2024-01-02_10-00-00'):
+        storage.save_results(connection, 'pep', run_at, [HEADER])
+    assert storage.last_runs(connection, 'pep', '2024-01-01', limit=1) == [
+        '2024-01-01_10-00-00'
+    ], 'Дата в --since должна включать запуски этого дня'
+    assert storage.last_runs(connection, 'pep', '2023-12-31') == []
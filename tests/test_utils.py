@@ -1,3 +1,5 @@
+import io
+
 import bs4
 import pytest
 import requests
@@ -6,6 +8,7 @@ from conftest import MAIN_DOC_URL
 
 try:
     from src import utils
+    from src.records import RecordCache
 except ModuleNotFoundError:
     assert False, 'Убедитесь что в директории `src` есть файл `utils.py`'
 except ImportError:
@@ -55,3 +58,79 @@ def test_get_response(mock_session):
             'делает запрос к странице и возвращает ответ. \n'
             'Кстати: You are breathtaken!'
         )
+
+
+class CountingBody(io.BytesIO):
+    bytes_read = 0
+
+    def read(self, *args):
+        data = super().read(*args)
+        self.bytes_read += len(data)
+        return data
+
+
+def test_iter_elements_stops_early(mock_session):
+    url = MAIN_DOC_URL + 'streamed_page/'
+    page = b'<html><body><h1>Title</h1>' + b'<p>x</p>' * 50000
+    body = CountingBody(page)
+    with requests_mock.Mocker() as mock:
+        mock.get(url, body=body)
+        elements = utils.iter_elements(mock_session, url, chunk_size=64)
+        for element in elements:
+            if element.tag == 'h1':
+                break
+        elements.close()
+    assert element.text == 'Title', (
+        'Функция `iter_elements` модуля `utils.py` должна выдавать '
+        'элементы страницы по мере разбора'
+    )
+    assert body.bytes_read < len(page), (
+        'Функция `iter_elements` модуля `utils.py` не должна дочитывать '
+        'страницу после закрытия генератора'
+    )
+
+
+def test_parse_in_processes_window():
+    consumed = []
+
+    def pages():
+        for number in range(20):
+            consumed.append(number)
+            yield ('page-{}'.format(number), 'x' * number, None), None
+
+    results = utils.parse_in_processes(len, pages(), procs=2)
+    assert next(results) == (0, None)
+    assert len(consumed) <= 4, (
+        'Функция `parse_in_processes` модуля `utils.py` не должна '
+        'забирать все страницы до выдачи первого результата'
+    )
+    assert [record for record, _ in results] == list(range(1, 20)), (
+        'Функция `parse_in_processes` модуля `utils.py` должна сохранять '
+        'порядок страниц'
+    )
+
+
+def text_length(text):
+    return len(text)
+
+
+@pytest.mark.parametrize('parse_procs', [1, 2])
+def test_fetch_records_touches_failed(mock_session, tmp_path, parse_procs):
+    urls = [MAIN_DOC_URL + 'page/', MAIN_DOC_URL + 'failed/']
+    path = tmp_path / 'records.json'
+    records = RecordCache(path)
+    records.store(text_length, urls[1], 'failed', 6)
+    records.save()
+    mock_session.records = RecordCache(path)
+    with requests_mock.Mocker() as mock:
+        mock.get(urls[0], text='page')
+        mock.get(urls[1], exc=requests.ConnectionError)
+        got = list(utils.fetch_records(
+            mock_session, urls, text_length, parse_procs=parse_procs
+        ))
+    assert got[0] == (4, None) and got[1][0] is None
+    mock_session.records.save()
+    assert len(mock_session.records.records) == 2, (
+        'Записи страниц, которые не удалось загрузить, '
+        'не должны удаляться из кеша записей'
+    )